@@ -1,5 +1,5 @@
 { "name": "Hospital Management System ",
-    "version": "1.0",
+    "version": "1.1",
     "summary": "A complete Hospital Management System to manage patients, doctors, staff, appointments, and hospital operations efficiently",
     "sequence": 10,
     "description": """
@@ -14,6 +14,7 @@
     'data': [
         'security/groups.xml', 
         'security/ir.model.access.csv', 
+        'security/hospital_rules.xml',
         'views/hospital_menu.xml', 
         'views/hospital_dashboard_menu.xml',
         'views/room.xml',          
@@ -52,7 +53,24 @@
         'views/patient_history_views.xml',
         'data/patient_history_sequence.xml',
         'data/prescription_sequence.xml',
-        'data/sequence_patient.xml',],
+        'data/sequence_patient.xml',
+        'data/patient_dashboard_cron.xml',
+        'data/patient_age_cron.xml',
+        'views/patient_import_views.xml',
+        'data/patient_import_cron.xml',
+        'views/patient_duplicate_views.xml',
+        'data/patient_duplicate_cron.xml',
+        'views/patient_history_report_views.xml',
+        'data/patient_history_report_cron.xml',
+        'views/staff_roster_views.xml',
+        'views/calendar_feed_views.xml',
+        'views/appointment_reminder_views.xml',
+        'data/appointment_reminder_cron.xml',
+        'views/bed_census_views.xml',
+        'data/bed_census_cron.xml',
+        'views/room_tariff_views.xml',
+        'data/appointment_slot_cron.xml',
+        'data/booking_bed_counter_cron.xml',],
     'installable': True,
     'application': True,
     'license': 'LGPL-3',
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from werkzeug.http import http_date
+
+from odoo import http
+from odoo.http import request
+
+
+class HospitalCalendarFeedController(http.Controller):
+
+    @http.route('/hospital/calendar/<string:token>.ics', type='http', auth='public', methods=['GET'], csrf=False)
+    def calendar_feed(self, token, **kwargs):
+        Feed = request.env['hospital.calendar.feed'].sudo()
+        feed = Feed.search([('access_token', '=', token)], limit=1)
+        if not feed:
+            return request.not_found()
+        if feed.dirty or not feed.etag:
+            feed._build()
+
+        last_modified = feed.last_build.replace(microsecond=0)
+        headers = [
+            ('ETag', f'"{feed.etag}"'),
+            ('Last-Modified', http_date(last_modified)),
+            ('Cache-Control', 'private, max-age=0, must-revalidate'),
+        ]
+        # conditional GET: clients polling an unchanged feed get an empty 304
+        if_none_match = request.httprequest.if_none_match
+        if_modified_since = request.httprequest.if_modified_since
+        if (if_none_match and if_none_match.contains(feed.etag)) or (
+                not if_none_match and if_modified_since
+                and if_modified_since.replace(tzinfo=None) >= last_modified):
+            return request.make_response('', headers=headers, status=304)
+
+        headers.append(('Content-Type', 'text/calendar; charset=utf-8'))
+        return request.make_response(feed.body, headers=headers)
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    # the counters used to include every confirmed / invoiced booking, past and future
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['hospital.booking']._rebuild_bed_counters()
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    # patient_code moved from a btree to a trigram index under the same name:
+    # Odoo only checks the name, so drop the old one to have it recreated
+    cr.execute("DROP INDEX IF EXISTS hospital_patient__patient_code_index")
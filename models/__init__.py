@@ -1,4 +1,5 @@
 # custom_addons/hospital_departments/models/__init__.py
+from . import overlap_mixin
 from . import department
 from . import patient
 from . import hospital_room
@@ -24,3 +25,14 @@ from . import patient_history_wizard
 from . import lab_test_type
 from . import lab_request
 from . import lab_result
+from . import ir_sequence
+from . import patient_import
+from . import patient_duplicate
+from . import patient_history
+from . import patient_history_report
+from . import staff_roster
+from . import appointment_slot
+from . import calendar_feed
+from . import appointment_reminder
+from . import bed_census
+from . import room_tariff
@@ -1,7 +1,14 @@
-from odoo import models, fields, api, exceptions, _
+import itertools
+import math
+from datetime import datetime, time, timedelta
+
+from dateutil import rrule
+
+from odoo import models, fields, api, exceptions, tools, _
 
 class Appointment(models.Model):
     _name = "hospital.appointment"
+    _inherit = ['hospital.overlap.mixin']
     _description = "Patient Appointment"
 
     patient_id = fields.Many2one(
@@ -9,6 +16,7 @@ class Appointment(models.Model):
         string="Patient",
         required=True,
         ondelete="cascade",
+        index=True,
     )
     department_id = fields.Many2one("hospital.department", string="Department", required=True)
     doctor_id = fields.Many2one(
@@ -19,6 +27,8 @@ class Appointment(models.Model):
     )
 
     appointment_date = fields.Datetime(string="Appointment Date", required=True)
+    duration = fields.Float(string="Duration (Hours)", required=True, default=0.5)
+    date_end = fields.Datetime(string="End", compute='_compute_date_end', store=True)
     reason = fields.Text(string="Reason for Visit")
 
     state = fields.Selection([
@@ -27,22 +37,55 @@ class Appointment(models.Model):
         ('done', 'Done'),
         ('cancelled', 'Cancelled'),
     ], default='draft', string="Status", tracking=True)
+    reminder_ids = fields.One2many('hospital.appointment.reminder', 'appointment_id', string="Reminders")
+
+    # ===== منع تداخل مواعيد الدكتور (على مستوى قاعدة البيانات) =====
+    # the period expression must stay in sync with _PERIOD_SQL below
+    _sql_constraints = [
+        ('duration_positive', 'CHECK(duration > 0)', 'The duration of an appointment must be positive.'),
+        ('doctor_no_overlap',
+         "EXCLUDE USING gist (doctor_id WITH =, "
+         "tsrange(appointment_date, appointment_date + duration * interval '1 hour') WITH &&) "
+         "WHERE (state IN ('draft', 'confirmed'))",
+         'The doctor already has another appointment during this time.'),
+    ]
+
+    _overlap_constraint = 'doctor_no_overlap'
+    _overlap_resource = 'doctor_id'
+    _ACTIVE_STATES = ('draft', 'confirmed')
+    _PERIOD_SQL = "tsrange({0}.appointment_date, {0}.appointment_date + {0}.duration * interval '1 hour')"
+
+    def init(self):
+        # due-reminder lookups: state = 'confirmed' AND appointment_date in a range
+        tools.create_index(self.env.cr, 'hospital_appointment_state_date_idx', self._table, ['state', 'appointment_date'])
+        self._report_overlaps()
+
+    @api.depends('appointment_date', 'duration')
+    def _compute_date_end(self):
+        for rec in self:
+            rec.date_end = rec.appointment_date and rec.appointment_date + timedelta(hours=rec.duration)
 
-    @api.constrains('doctor_id', 'appointment_date', 'state')
+    @api.constrains('doctor_id', 'appointment_date', 'duration', 'state')
     def _check_doctor_availability(self):
-        for record in self:
-            if record.state in ['draft', 'confirmed']:
-                conflict = self.search([
-                    ('id', '!=', record.id),
-                    ('doctor_id', '=', record.doctor_id.id),
-                    ('appointment_date', '=', record.appointment_date),
-                    ('state', 'in', ['draft', 'confirmed'])
-                ], limit=1)
-                if conflict:
-                    raise exceptions.ValidationError(_(
-                        "Doctor %s already has another appointment at this time."
-                        % record.doctor_id.name
-                    ))
+        overlap = self._find_overlap()
+        if overlap:
+            record, other = overlap
+            raise exceptions.ValidationError(_(
+                "Doctor %(doctor)s already has another appointment at this time (%(date)s).",
+                doctor=record.doctor_id.name,
+                date=other.appointment_date,
+            ))
+
+    @api.onchange('doctor_id', 'appointment_date', 'duration')
+    def _onchange_doctor_roster(self):
+        if not (self.doctor_id and self.appointment_date):
+            return
+        Roster = self.env['hospital.staff.roster']
+        if not Roster._is_staff_available(self.doctor_id._origin, self.appointment_date, self.date_end):
+            return {'warning': {
+                'title': _("Doctor not on duty"),
+                'message': _("%s is not rostered (or is on leave) at this time.", self.doctor_id.name),
+            }}
 
     # ----------- Actions ----------
     def action_confirm(self):
@@ -66,13 +109,160 @@ class Appointment(models.Model):
             rec.state = 'draft'
 
     # ----------- override create ----------
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(Appointment, self).create(vals_list)
+        # ربط الدكتور بالمرضى (استعلام واحد للدفعة كلها)
+        records._link_doctor_patients()
+        # عداد المواعيد: مرة واحدة لكل مريض
+        records.patient_id._update_appointment_counts()
+        # خرائط المواعيد الفارغة: تُبنى قبل الـ commit
+        self.env['hospital.appointment.slot.map']._mark_dirty(records._get_slot_keys())
+        records._mark_feeds_dirty()
+        return records
+
+    def _link_doctor_patients(self):
+        """Make the doctor of each patient's latest appointment in ``self`` their doctor, in one UPDATE."""
+        doctor_by_patient = {}
+        for rec in self.sorted('appointment_date'):
+            if rec.doctor_id and rec.patient_id:
+                doctor_by_patient[rec.patient_id.id] = rec.doctor_id.id
+        if not doctor_by_patient:
+            return
+        Patient = self.env['hospital.patient']
+        Patient.flush_model(['doctor_id'])
+        self.env.cr.execute("""
+            UPDATE hospital_patient p
+               SET doctor_id = v.doctor_id, write_uid = %s, write_date = (now() at time zone 'UTC')
+              FROM (SELECT unnest(%s::int[]) AS patient_id, unnest(%s::int[]) AS doctor_id) v
+             WHERE p.id = v.patient_id
+               AND p.doctor_id IS DISTINCT FROM v.doctor_id
+         RETURNING p.id
+        """, [self.env.uid, list(doctor_by_patient), list(doctor_by_patient.values())])
+        changed = Patient.browse(row[0] for row in self.env.cr.fetchall())
+        if changed:
+            changed.invalidate_recordset(['doctor_id', 'write_uid', 'write_date'])
+            self.env['hospital.staff'].invalidate_model(['patient_ids'])
+            self.env['hospital.patient.dashboard']._schedule_dashboard_refresh()
+
+    # ----------- recurring schedules ----------
+    _MAX_OCCURRENCES = 500
+
     @api.model
-    def create(self, vals):
-        rec = super(Appointment, self).create(vals)
-        if rec.doctor_id and rec.patient_id:
-            if rec.patient_id.id not in rec.doctor_id.patient_ids.ids:
-                rec.doctor_id.write({
-                    'patient_ids': [(4, rec.patient_id.id)]
-                })
-
-        return rec
\ No newline at end of file
+    def schedule_recurring(self, vals, rule):
+        """Create the appointments of ``vals`` repeated along an RFC 5545 recurrence rule.
+
+        ``rule`` is e.g. ``"FREQ=WEEKLY;BYDAY=MO,TH;COUNT=12"``; the first occurrence
+        is ``vals['appointment_date']``. Every occurrence is created, checked for
+        conflicts and linked to its doctor in one batch.
+        """
+        start = fields.Datetime.to_datetime(vals.get('appointment_date'))
+        if not start:
+            raise exceptions.UserError(_("Set the date of the first appointment."))
+        try:
+            recurrence = rrule.rrulestr(rule, dtstart=start)
+        except (ValueError, TypeError) as e:
+            raise exceptions.UserError(_("Invalid recurrence rule: %s", e))
+        dates = list(itertools.islice(recurrence, self._MAX_OCCURRENCES + 1))
+        if len(dates) > self._MAX_OCCURRENCES:
+            raise exceptions.UserError(_(
+                "A recurring schedule is limited to %s appointments; add COUNT or UNTIL to the rule.",
+                self._MAX_OCCURRENCES,
+            ))
+        return self.create([dict(vals, appointment_date=date) for date in dates])
+
+    def write(self, vals):
+        if 'appointment_date' in vals:
+            # a rescheduled visit gets its reminders again
+            self.reminder_ids.sudo().unlink()
+        patients = self.patient_id if 'patient_id' in vals else None
+        slot_keys = self._get_slot_keys() if self._SLOT_FIELDS & vals.keys() else set()
+        feeds_changed = bool(self._FEED_FIELDS & vals.keys())
+        if feeds_changed:
+            self._mark_feeds_dirty()
+        res = super().write(vals)
+        if patients is not None:
+            (patients | self.patient_id)._update_appointment_counts()
+        if slot_keys:
+            self.env['hospital.appointment.slot.map']._mark_dirty(slot_keys | self._get_slot_keys())
+        if feeds_changed:
+            self._mark_feeds_dirty()
+        return res
+
+    def unlink(self):
+        patients = self.patient_id
+        self.env['hospital.appointment.slot.map']._mark_dirty(self._get_slot_keys())
+        self._mark_feeds_dirty()
+        res = super().unlink()
+        patients._update_appointment_counts()
+        return res
+
+    # ----------- calendar feeds ----------
+    _FEED_FIELDS = {'doctor_id', 'department_id', 'patient_id', 'appointment_date', 'duration', 'state'}
+
+    def _mark_feeds_dirty(self):
+        self.env['hospital.calendar.feed'].sudo()._mark_dirty(self.doctor_id.ids, self.department_id.ids)
+
+    # ----------- free slots ----------
+    _SLOT_FIELDS = {'doctor_id', 'appointment_date', 'duration', 'state'}
+
+    def _get_slot_keys(self):
+        SlotMap = self.env['hospital.appointment.slot.map']
+        return {
+            (rec.doctor_id.id, day)
+            for rec in self
+            for day in SlotMap._days_between(rec.appointment_date, rec.date_end)
+        }
+
+    @api.model
+    def find_available_slots(self, date_from, date_to, duration=0.5, department=None, specialization=None, limit=10):
+        """Return the earliest free slots of the eligible doctors.
+
+        :param date_from, date_to: search window (UTC datetimes)
+        :param duration: length of the visit in hours
+        :param department, specialization: optional records or ids restricting the doctors
+        :return: list of ``{'doctor_id', 'start', 'end'}`` dicts sorted by start
+        """
+        date_from = fields.Datetime.to_datetime(date_from)
+        date_to = fields.Datetime.to_datetime(date_to)
+        SlotMap = self.env['hospital.appointment.slot.map']
+        step = timedelta(minutes=SlotMap.SLOT_MINUTES)
+        needed = max(1, math.ceil(timedelta(hours=duration) / step))
+
+        # the manual availability flag takes a doctor off duty, as in _get_available_staff
+        domain = [('job_title', '=', 'doctor'), ('is_available', '=', True)]
+        if department:
+            domain.append(('department_id', '=', getattr(department, 'id', department)))
+        if specialization:
+            domain.append(('specialization_id', '=', getattr(specialization, 'id', specialization)))
+        doctor_ids = self.env['hospital.staff'].search(domain).ids
+        if not doctor_ids or date_to <= date_from:
+            return []
+
+        days = SlotMap._days_between(date_from, date_to)
+        masks = SlotMap._get_masks(doctor_ids, days[0], days[-1])
+        # the days of the window are laid end to end, so a slot may run past midnight
+        origin = datetime.combine(days[0], time.min)
+        lo = math.ceil((date_from - origin) / step)
+        hi = math.floor((date_to - origin) / step)
+        window = ((1 << max(hi - lo, 0)) - 1) << lo
+        slots = []
+        for doctor_id in doctor_ids:
+            free = 0
+            for index, day in enumerate(days):
+                free |= masks.get((doctor_id, day), 0) << (index * SlotMap.SLOTS_PER_DAY)
+            free &= window
+            # bit i of ``starts`` is set when slots i .. i + needed - 1 are all free
+            starts = free
+            for shift in range(1, needed):
+                starts &= free >> shift
+            # the earliest ``limit`` starts of each doctor are enough
+            for _i in range(limit):
+                if not starts:
+                    break
+                index = (starts & -starts).bit_length() - 1
+                starts &= starts - 1
+                start = origin + index * step
+                slots.append({'doctor_id': doctor_id, 'start': start, 'end': start + timedelta(hours=duration)})
+        slots.sort(key=lambda slot: (slot['start'], slot['doctor_id']))
+        return slots[:limit]
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from markupsafe import Markup
+
+from odoo import models, fields, api, tools, _
+
+_logger = logging.getLogger(__name__)
+
+
+class HospitalAppointmentReminder(models.Model):
+    """Outbox of appointment reminders.
+
+    One row per (appointment, kind): the unique constraint makes enqueuing
+    idempotent, and a reminder leaves ``queued`` in the same transaction as
+    its ``mail.mail`` is created, so a crashed run never sends it twice.
+    """
+    _name = 'hospital.appointment.reminder'
+    _description = 'Appointment Reminder'
+    _order = 'scheduled_date desc, id desc'
+
+    appointment_id = fields.Many2one('hospital.appointment', string="Appointment", required=True,
+                                     ondelete='cascade', index=True)
+    patient_id = fields.Many2one(related='appointment_id.patient_id')
+    appointment_date = fields.Datetime(related='appointment_id.appointment_date')
+    kind = fields.Selection([
+        ('24h', '24 hours before'),
+        ('2h', '2 hours before'),
+    ], string="Reminder", required=True)
+    scheduled_date = fields.Datetime(string="Due", required=True)
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('skipped', 'Skipped'),
+    ], string="Status", default='queued', required=True)
+    mail_id = fields.Many2one('mail.mail', string="Email", ondelete='set null', readonly=True)
+    sent_date = fields.Datetime(string="Sent On", readonly=True)
+    message = fields.Char(string="Message", readonly=True)
+
+    _sql_constraints = [
+        ('appointment_kind_unique', 'unique(appointment_id, kind)', 'This reminder was already scheduled.'),
+    ]
+
+    _OFFSETS = {'24h': timedelta(hours=24), '2h': timedelta(hours=2)}
+    _RATE_PARAM = 'the_healing_hms.reminder_rate_per_minute'
+    _DEFAULT_RATE = 60
+
+    def init(self):
+        tools.create_index(self.env.cr, 'hospital_appointment_reminder_queue_idx', self._table,
+                           ['scheduled_date'], where="state = 'queued'")
+
+    # ================== Cron ==================
+    @api.model
+    def _cron_send_reminders(self):
+        self._enqueue_due()
+        self.env.cr.commit()
+        self._dispatch(auto_commit=True)
+
+    @api.model
+    def _enqueue_due(self):
+        """Queue the reminders falling due, one INSERT per kind over the
+        ``(state, appointment_date)`` index."""
+        now = fields.Datetime.now()
+        self.env['hospital.appointment'].flush_model(['state', 'appointment_date'])
+        for kind, offset in self._OFFSETS.items():
+            # the 24h reminder is pointless once the 2h one is due
+            lower = now + self._OFFSETS['2h'] if kind == '24h' else now
+            self.env.cr.execute("""
+                INSERT INTO hospital_appointment_reminder
+                       (appointment_id, kind, scheduled_date, state, create_uid, write_uid, create_date, write_date)
+                SELECT a.id, %(kind)s, a.appointment_date - %(offset)s, 'queued', %(uid)s, %(uid)s, %(now)s, %(now)s
+                  FROM hospital_appointment a
+                 WHERE a.state = 'confirmed'
+                   AND a.appointment_date > %(lower)s
+                   AND a.appointment_date <= %(upper)s
+                ON CONFLICT (appointment_id, kind) DO NOTHING
+            """, {
+                'kind': kind, 'offset': offset, 'uid': self.env.uid, 'now': now,
+                'lower': lower, 'upper': now + offset,
+            })
+
+    @api.model
+    def _dispatch(self, auto_commit=False):
+        """Send the queued reminders.
+
+        From the cron (``auto_commit``), one run sends at most the per-minute
+        quota and schedules the next run a minute later if more are queued,
+        instead of waiting in a cron worker.
+        """
+        rate = int(self.env['ir.config_parameter'].sudo().get_param(self._RATE_PARAM, self._DEFAULT_RATE)) or self._DEFAULT_RATE
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM hospital_appointment_reminder
+                 WHERE state = 'queued'
+              ORDER BY scheduled_date, id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, [rate])
+            batch = self.browse(row[0] for row in self.env.cr.fetchall())
+            if not batch:
+                return
+            mails = batch._send()
+            if auto_commit:
+                self.env.cr.commit()
+            mails.send(auto_commit=auto_commit)
+            if not auto_commit:
+                continue
+            if len(batch) == rate:
+                # quota of the minute used up: the rest goes to the next minute
+                self.env.ref('the_healing_hms.ir_cron_appointment_reminder')._trigger(
+                    fields.Datetime.now() + timedelta(minutes=1))
+            return
+
+    def _send(self):
+        """Render the reminders of ``self`` and hand them to ``mail.mail`` in one batch."""
+        to_send = self.filtered(lambda r: r.appointment_id.state == 'confirmed' and r.patient_id.email)
+        (self - to_send).write({'state': 'skipped', 'message': _("Cancelled appointment or no patient email.")})
+        if not to_send:
+            return self.env['mail.mail']
+        mails = self.env['mail.mail'].sudo().create([reminder._prepare_mail_values() for reminder in to_send])
+        now = fields.Datetime.now()
+        for reminder, mail in zip(to_send, mails):
+            reminder.write({'state': 'sent', 'mail_id': mail.id, 'sent_date': now})
+        return mails
+
+    def _prepare_mail_values(self):
+        self.ensure_one()
+        app = self.appointment_id
+        date = fields.Datetime.context_timestamp(self, app.appointment_date).strftime('%Y-%m-%d %H:%M')
+        return {
+            'subject': _("Reminder: your appointment on %s", date),
+            'email_to': app.patient_id.email,
+            'body_html': Markup("<p>%s</p><p>%s</p>") % (
+                _("Dear %s,", app.patient_id.name),
+                _("This is a reminder of your appointment with Dr. %(doctor)s (%(department)s) on %(date)s.",
+                  doctor=app.doctor_id.name, department=app.department_id.name, date=date),
+            ),
+            'auto_delete': True,
+            'model': app._name,
+            'res_id': app.id,
+        }
+
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import math
+from datetime import datetime, time, timedelta
+
+from odoo import models, fields, api, tools
+
+
+class HospitalAppointmentSlotMap(models.Model):
+    """Free 15-minute slots of a doctor for one (UTC) day, as a 96-bit mask.
+
+    Bit ``i`` is set when slot ``i`` is inside a shift / on-call period of
+    the roster, outside any leave and not taken by an active appointment.
+    Maps are only written right before commit, for the (doctor, day) pairs
+    the transaction touched, and by a nightly cron building the coming days;
+    lookups compute whatever is missing in memory and never write.
+    """
+    _name = 'hospital.appointment.slot.map'
+    _description = 'Doctor Free Slot Map'
+    _log_access = False
+    _order = 'day, doctor_id'
+
+    doctor_id = fields.Many2one('hospital.staff', string="Doctor", required=True, ondelete='cascade')
+    day = fields.Date(string="Day", required=True)
+    free_mask = fields.Char(string="Free Slots (hex)", required=True, default='0')
+
+    _sql_constraints = [
+        ('doctor_day_unique', 'unique(doctor_id, day)', 'Only one slot map per doctor and day.'),
+    ]
+
+    SLOT_MINUTES = 15
+    SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+    _DIRTY_PRECOMMIT_KEY = 'hospital.appointment.slot.map.dirty'
+    # days ahead kept built by the cron
+    _HORIZON_DAYS = 60
+    _CRON_BATCH_SIZE = 200
+
+    # ================== Incremental maintenance ==================
+    @api.model
+    def _days_between(self, start, end):
+        """Days touched by the ``[start, end)`` period."""
+        if not start:
+            return []
+        end = max(end or start, start)
+        last = (end - timedelta(microseconds=1)).date() if end > start else start.date()
+        return [start.date() + timedelta(days=i) for i in range((last - start.date()).days + 1)]
+
+    @api.model
+    def _mark_dirty(self, keys):
+        """Queue ``{(doctor_id, day)}`` for a rebuild right before commit."""
+        keys = {key for key in keys if key[0]}
+        if not keys:
+            return
+        data = self.env.cr.precommit.data
+        dirty = data.get(self._DIRTY_PRECOMMIT_KEY)
+        if dirty is None:
+            dirty = data[self._DIRTY_PRECOMMIT_KEY] = set()
+
+            @self.env.cr.precommit.add
+            def _rebuild_dirty_slot_maps():
+                self._flush_dirty()
+        dirty.update(keys)
+
+    @api.model
+    def _flush_dirty(self):
+        dirty = self.env.cr.precommit.data.pop(self._DIRTY_PRECOMMIT_KEY, None)
+        if dirty:
+            self._rebuild(dirty)
+
+    @api.model
+    def _rebuild(self, keys):
+        """Recompute and upsert the maps of ``{(doctor_id, day)}``."""
+        masks = self._compute_masks(keys)
+        if not masks:
+            return
+        keys = list(masks)
+        self.env.cr.execute("""
+            INSERT INTO hospital_appointment_slot_map (doctor_id, day, free_mask)
+                 SELECT * FROM unnest(%s::int[], %s::date[], %s::varchar[])
+            ON CONFLICT (doctor_id, day) DO UPDATE SET free_mask = EXCLUDED.free_mask
+        """, [[key[0] for key in keys], [key[1] for key in keys], ['%x' % masks[key] for key in keys]])
+        self.invalidate_model()
+
+    @api.model
+    def _cron_build_slot_maps(self):
+        """Build the missing maps of the coming days and drop the past ones."""
+        today = fields.Date.context_today(self)
+        last = today + timedelta(days=self._HORIZON_DAYS - 1)
+        cr = self.env.cr
+        cr.execute("DELETE FROM hospital_appointment_slot_map WHERE day < %s", [today])
+        doctor_ids = self.env['hospital.staff'].search([('job_title', '=', 'doctor')]).ids
+        days = [today + timedelta(days=i) for i in range(self._HORIZON_DAYS)]
+        for batch in tools.split_every(self._CRON_BATCH_SIZE, doctor_ids, list):
+            cr.execute("""
+                SELECT doctor_id, day FROM hospital_appointment_slot_map
+                 WHERE doctor_id IN %s AND day BETWEEN %s AND %s
+            """, [tuple(batch), today, last])
+            existing = set(cr.fetchall())
+            self._rebuild({(doctor_id, day) for doctor_id in batch for day in days} - existing)
+            cr.commit()
+
+    @api.model
+    def _compute_masks(self, keys):
+        """Return ``{(doctor_id, day): int}`` for ``keys``, read-only, in a fixed number of queries."""
+        keys = set(keys)
+        if not keys:
+            return {}
+        doctor_ids = tuple({doctor_id for doctor_id, _day in keys})
+        first = min(day for _doctor_id, day in keys)
+        last = max(day for _doctor_id, day in keys)
+        period = {
+            'doctors': doctor_ids,
+            'from': datetime.combine(first, time.min),
+            'to': datetime.combine(last + timedelta(days=1), time.min),
+        }
+        self.env.flush_all()
+        cr = self.env.cr
+
+        working, leave, busy = {}, {}, {}
+        cr.execute("""
+            SELECT staff_id, kind, date_start, date_end
+              FROM hospital_staff_roster
+             WHERE staff_id IN %(doctors)s
+               AND tsrange(date_start, date_end) && tsrange(%(from)s, %(to)s)
+        """, period)
+        for staff_id, kind, start, end in cr.fetchall():
+            target = leave if kind == 'leave' else working
+            # a working period only frees the slots it fully covers
+            self._add_period(target, staff_id, start, end, keys, inner=kind != 'leave')
+
+        Appointment = self.env['hospital.appointment']
+        cr.execute(f"""
+            SELECT a.doctor_id, a.appointment_date, a.date_end
+              FROM hospital_appointment a
+             WHERE a.doctor_id IN %(doctors)s
+               AND a.state IN %(states)s
+               AND {Appointment._PERIOD_SQL.format('a')} && tsrange(%(from)s, %(to)s)
+        """, dict(period, states=Appointment._ACTIVE_STATES))
+        for doctor_id, start, end in cr.fetchall():
+            self._add_period(busy, doctor_id, start, end, keys, inner=False)
+
+        return {
+            key: working.get(key, 0) & ~leave.get(key, 0) & ~busy.get(key, 0)
+            for key in keys
+        }
+
+    @api.model
+    def _add_period(self, masks, doctor_id, start, end, keys, inner):
+        """OR the slots of ``[start, end)`` into ``masks[(doctor_id, day)]`` for the days in ``keys``."""
+        step = timedelta(minutes=self.SLOT_MINUTES)
+        for day in self._days_between(start, end):
+            if (doctor_id, day) not in keys:
+                continue
+            day_start = datetime.combine(day, time.min)
+            lo = (start - day_start) / step
+            hi = (end - day_start) / step
+            lo = math.ceil(lo) if inner else math.floor(lo)
+            hi = math.floor(hi) if inner else math.ceil(hi)
+            lo, hi = max(lo, 0), min(hi, self.SLOTS_PER_DAY)
+            if hi > lo:
+                masks[(doctor_id, day)] = masks.get((doctor_id, day), 0) | (((1 << (hi - lo)) - 1) << lo)
+
+    # ================== Lookup ==================
+    @api.model
+    def _get_masks(self, doctor_ids, first, last):
+        """Return ``{(doctor_id, day): int}`` without writing anything.
+
+        Maps not built yet, or changed by the current transaction and not
+        rebuilt yet, are computed in memory.
+        """
+        days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        wanted = {(doctor_id, day) for doctor_id in doctor_ids for day in days}
+        self.env.cr.execute("""
+            SELECT doctor_id, day, free_mask FROM hospital_appointment_slot_map
+             WHERE doctor_id IN %s AND day BETWEEN %s AND %s
+        """, [tuple(doctor_ids), first, last])
+        masks = {(doctor_id, day): int(mask, 16) for doctor_id, day, mask in self.env.cr.fetchall()}
+        dirty = self.env.cr.precommit.data.get(self._DIRTY_PRECOMMIT_KEY) or set()
+        stale = (wanted - masks.keys()) | (wanted & dirty)
+        if stale:
+            masks.update(self._compute_masks(stale))
+        return masks
+
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api
+from odoo.tools.sql import table_kind, TableKind
+
+
+class HospitalBedCensus(models.Model):
+    """Hourly bed occupancy per department and room type.
+
+    Append-only table partitioned by month: the graph views only touch the
+    partitions of the period shown, and old months are dropped as a whole.
+    The model reads it through a plain view: the registry does not count a
+    partitioned table as a table.
+    """
+    _name = 'hospital.bed.census'
+    _description = 'Bed Census'
+    _auto = False
+    _log_access = False
+    _order = 'snapshot_at desc'
+
+    snapshot_at = fields.Datetime(string="Time", readonly=True)
+    department_id = fields.Many2one('hospital.department', string="Department", readonly=True)
+    room_type = fields.Selection([
+        ('single', 'Single (1 Bed)'),
+        ('double', 'Double (2 Beds)'),
+        ('ward', 'Ward (7 Beds)'),
+    ], string="Room Type", readonly=True)
+    # one row per department and room type: the hospital figures are the sums
+    total_beds = fields.Integer(string="Beds", readonly=True, aggregator='sum')
+    occupied_beds = fields.Integer(string="Occupied Beds", readonly=True, aggregator='sum')
+    available_beds = fields.Integer(string="Available Beds", readonly=True, aggregator='sum')
+
+    _RETENTION_MONTHS = 24
+    # the partitioned table behind the view of the model
+    _DATA_TABLE = 'hospital_bed_census_data'
+
+    def init(self):
+        cr = self.env.cr
+        if table_kind(cr, self._table) not in (None, TableKind.View):
+            # older versions exposed the partitioned table itself
+            cr.execute(f"ALTER TABLE {self._table} RENAME TO {self._DATA_TABLE}")
+        if table_kind(cr, self._DATA_TABLE) is None:
+            self._create_data_table()
+        cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT id, snapshot_at, department_id, room_type, total_beds, occupied_beds, available_beds
+                  FROM {self._DATA_TABLE}
+            )
+        """)
+
+    def _create_data_table(self):
+        cr = self.env.cr
+        cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {self._table}_id_seq")
+        cr.execute(f"""
+            CREATE TABLE {self._DATA_TABLE} (
+                id bigint NOT NULL DEFAULT nextval('{self._table}_id_seq'),
+                snapshot_at timestamp NOT NULL,
+                department_id integer,
+                room_type varchar,
+                total_beds integer NOT NULL DEFAULT 0,
+                occupied_beds integer NOT NULL DEFAULT 0,
+                available_beds integer NOT NULL DEFAULT 0,
+                PRIMARY KEY (id, snapshot_at)
+            ) PARTITION BY RANGE (snapshot_at)
+        """)
+        cr.execute(f"ALTER SEQUENCE {self._table}_id_seq OWNED BY {self._DATA_TABLE}.id")
+        # time-range graphs, optionally narrowed to a department
+        cr.execute(f"CREATE INDEX {self._table}_snapshot_idx ON {self._DATA_TABLE} (snapshot_at, department_id)")
+        self._ensure_partition(date.today())
+
+    # ================== Partitions ==================
+    @api.model
+    def _partition_name(self, month):
+        return f"{self._table}_{month:y%Ym%m}"
+
+    @api.model
+    def _ensure_partition(self, day):
+        month = day.replace(day=1)
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self._partition_name(month)}
+                PARTITION OF {self._DATA_TABLE}
+                FOR VALUES FROM (%s) TO (%s)
+        """, [month, month + relativedelta(months=1)])
+
+    @api.model
+    def _drop_old_partitions(self):
+        limit = self._partition_name(date.today().replace(day=1) - relativedelta(months=self._RETENTION_MONTHS))
+        self.env.cr.execute("""
+            SELECT c.relname
+              FROM pg_inherits i
+              JOIN pg_class c ON c.oid = i.inhrelid
+              JOIN pg_class p ON p.oid = i.inhparent
+             WHERE p.relname = %s
+        """, [self._DATA_TABLE])
+        for (name,) in self.env.cr.fetchall():
+            # partition names sort chronologically
+            if name < limit:
+                self.env.cr.execute(f'DROP TABLE "{name}"')
+
+    # ================== Snapshot ==================
+    @api.model
+    def _cron_take_snapshot(self):
+        self._take_snapshot()
+        self._drop_old_partitions()
+
+    @api.model
+    def _take_snapshot(self, at=None):
+        """Store the bed counts of the hour of ``at`` (now by default); re-running an hour replaces it."""
+        at = (at or fields.Datetime.now()).replace(minute=0, second=0, microsecond=0)
+        self._ensure_partition(at.date())
+        # the next month is prepared ahead, so the first hour of a month never waits for DDL
+        self._ensure_partition(at.date() + relativedelta(months=1))
+        for model in ('hospital.room', 'hospital.bed', 'hospital.booking'):
+            self.env[model].flush_model()
+        cr = self.env.cr
+        cr.execute(f"DELETE FROM {self._DATA_TABLE} WHERE snapshot_at = %s", [at])
+        cr.execute(f"""
+            INSERT INTO {self._DATA_TABLE} (snapshot_at, department_id, room_type, total_beds, occupied_beds, available_beds)
+            SELECT %(at)s, department_id, room_type, count(*),
+                   count(*) FILTER (WHERE occupied),
+                   count(*) FILTER (WHERE NOT occupied)
+              FROM (
+                    SELECT r.department_id, r.room_type,
+                           EXISTS (SELECT 1 FROM hospital_booking k
+                                    WHERE k.bed_id = b.id
+                                      AND k.state IN %(active)s
+                                      AND tsrange(k.date_from, k.date_to) @> %(at)s::timestamp) AS occupied
+                      FROM hospital_bed b
+                      JOIN hospital_room r ON r.id = b.room_id
+                   ) beds
+          GROUP BY department_id, room_type
+        """, {'at': at, 'active': self.env['hospital.booking']._ACTIVE_STATES})
+        self.invalidate_model()
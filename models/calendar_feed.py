@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import uuid
+from datetime import timedelta
+
+from odoo import models, fields, api, tools, _
+from odoo.osv import expression
+
+
+class HospitalCalendarFeed(models.Model):
+    """iCalendar feed of the appointments of a doctor or a department.
+
+    The rendered ``VEVENT`` of every appointment is kept in ``events`` and
+    only the appointments written since ``last_build`` are read back and
+    re-rendered; the assembled body is cached with its ETag until an
+    appointment change marks the feed ``dirty``. Events carry no clinical
+    data (no visit reason, no patient name): the URL is a bearer token.
+    """
+    _name = 'hospital.calendar.feed'
+    _description = 'Appointment Calendar Feed'
+
+    name = fields.Char(string="Feed", compute='_compute_name')
+    staff_id = fields.Many2one('hospital.staff', string="Doctor", ondelete='cascade', index='btree_not_null')
+    department_id = fields.Many2one('hospital.department', string="Department", ondelete='cascade', index='btree_not_null')
+    access_token = fields.Char(string="Token", required=True, copy=False, readonly=True,
+                               default=lambda self: uuid.uuid4().hex)
+    url = fields.Char(string="Feed URL", compute='_compute_url')
+
+    # ===== cache =====
+    dirty = fields.Boolean(string="Needs Rebuild", default=True, readonly=True)
+    last_build = fields.Datetime(string="Last Build", readonly=True)
+    etag = fields.Char(string="ETag", readonly=True)
+    body = fields.Text(string="Content", readonly=True, prefetch=False)
+    events = fields.Json(string="Rendered Events", readonly=True, prefetch=False)
+
+    _sql_constraints = [
+        ('access_token_unique', 'unique(access_token)', 'The feed token must be unique.'),
+        ('owner_check', 'CHECK((staff_id IS NULL) != (department_id IS NULL))',
+         'A feed belongs either to a doctor or to a department.'),
+        ('staff_unique', 'unique(staff_id)', 'This doctor already has a calendar feed.'),
+        ('department_unique', 'unique(department_id)', 'This department already has a calendar feed.'),
+    ]
+
+    # appointments older than this are left out of the feed
+    _HISTORY_DAYS = 90
+
+    def init(self):
+        # incremental builds read back the appointments written since the last one
+        tools.create_index(
+            self.env.cr, 'hospital_appointment_write_date_idx', 'hospital_appointment', ['write_date'])
+
+    @api.depends('staff_id', 'department_id')
+    def _compute_name(self):
+        for feed in self:
+            feed.name = feed.staff_id.name or feed.department_id.name
+
+    def _compute_url(self):
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        for feed in self:
+            feed.url = f"{base_url}/hospital/calendar/{feed.access_token}.ics"
+
+    @api.model
+    def _get_feed(self, owner):
+        """Return the feed of a ``hospital.staff`` or ``hospital.department`` record, creating it if needed."""
+        owner.ensure_one()
+        fname = 'staff_id' if owner._name == 'hospital.staff' else 'department_id'
+        return self.search([(fname, '=', owner.id)], limit=1) or self.create({fname: owner.id})
+
+    def _action_open(self):
+        self.ensure_one()
+        return {
+            'name': _('Calendar Feed'),
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'view_mode': 'form',
+            'res_id': self.id,
+            'target': 'new',
+        }
+
+    def action_regenerate_token(self):
+        for feed in self:
+            feed.access_token = uuid.uuid4().hex
+
+    # ================== Invalidation ==================
+    @api.model
+    def _mark_dirty(self, doctor_ids, department_ids):
+        doctor_ids, department_ids = tuple(filter(None, doctor_ids)), tuple(filter(None, department_ids))
+        if not (doctor_ids or department_ids):
+            return
+        self.env.cr.execute("""
+            UPDATE hospital_calendar_feed SET dirty = true
+             WHERE NOT dirty
+               AND (staff_id IN %s OR department_id IN %s)
+        """, [doctor_ids or (None,), department_ids or (None,)])
+        if self.env.cr.rowcount:
+            self.invalidate_model(['dirty'])
+
+    # ================== Build ==================
+    def _get_domain(self, since):
+        self.ensure_one()
+        owner = ('doctor_id', '=', self.staff_id.id) if self.staff_id else ('department_id', '=', self.department_id.id)
+        return [owner, ('appointment_date', '>=', since), ('state', '!=', 'cancelled')]
+
+    def _build(self):
+        """Re-render the appointments written since the last build and reassemble the body.
+
+        ``events`` maps appointment ids to ``[start, vevent]``.
+        """
+        self.ensure_one()
+        started = fields.Datetime.now()
+        since = started - timedelta(days=self._HISTORY_DAYS)
+        Appointment = self.env['hospital.appointment'].sudo()
+        domain = self._get_domain(since)
+        events = dict(self.events or {}) if self.last_build else {}
+        if self.last_build and all(isinstance(event, list) for event in events.values()):
+            known = Appointment.browse(int(app_id) for app_id in events)
+            existing = known.exists()
+            for app in known - existing:
+                events.pop(str(app.id))
+            # written since the last build: new in the feed, or leaving it (cancelled, other doctor...)
+            changed = Appointment.search(expression.AND([
+                [('write_date', '>=', self.last_build)],
+                expression.OR([domain, [('id', 'in', existing.ids)]]),
+            ]))
+        else:
+            events = {}
+            changed = Appointment.search(domain)
+        in_feed = changed.filtered_domain(domain)
+        for app in changed - in_feed:
+            events.pop(str(app.id), None)
+        for app in in_feed:
+            events[str(app.id)] = [fields.Datetime.to_string(app.appointment_date), self._render_event(app)]
+        # past appointments leave the feed without being written
+        since = fields.Datetime.to_string(since)
+        events = {app_id: event for app_id, event in events.items() if event[0] >= since}
+
+        ordered = sorted(events.items(), key=lambda item: (item[1][0], int(item[0])))
+        body = '\r\n'.join([
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            'PRODID:-//The Healing HMS//Appointments//EN',
+            'CALSCALE:GREGORIAN',
+            'X-WR-CALNAME:%s' % _ics_escape(self.name or ''),
+            *(event[1] for _app_id, event in ordered),
+            'END:VCALENDAR',
+        ]) + '\r\n'
+        self.write({
+            'events': events,
+            'body': body,
+            'etag': hashlib.sha1(body.encode()).hexdigest(),
+            'last_build': started,
+            'dirty': False,
+        })
+
+    def _render_event(self, app):
+        summary = _("Appointment - %s", app.patient_id.patient_code or app.patient_id.id)
+        if self.department_id:
+            summary = f"{summary} ({app.doctor_id.name})"
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:appointment-{app.id}@{self.env.cr.dbname}',
+            f'DTSTAMP:{_ics_date(app.write_date)}',
+            f'DTSTART:{_ics_date(app.appointment_date)}',
+            f'DTEND:{_ics_date(app.date_end or app.appointment_date)}',
+            f'SUMMARY:{_ics_escape(summary)}',
+            f'STATUS:{"CONFIRMED" if app.state in ("confirmed", "done") else "TENTATIVE"}',
+            'END:VEVENT',
+        ]
+        return '\r\n'.join(lines)
+
+
+def _ics_date(value):
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def _ics_escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+class HospitalStaff(models.Model):
+    _inherit = 'hospital.staff'
+
+    def action_open_calendar_feed(self):
+        self.ensure_one()
+        return self.env['hospital.calendar.feed']._get_feed(self)._action_open()
+
+
+class HospitalDepartment(models.Model):
+    _inherit = 'hospital.department'
+
+    def action_open_calendar_feed(self):
+        self.ensure_one()
+        return self.env['hospital.calendar.feed']._get_feed(self)._action_open()
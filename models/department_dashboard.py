@@ -23,8 +23,9 @@ class HospitalDepartmentDashboard(models.Model):
     available_rooms = fields.Integer(string="Available Rooms", compute='_compute_kpis', store=True)
 
     # ===== Doctors =====
-    doctor_available = fields.Integer(string="Available Doctors", compute='_compute_kpis', store=True)
-    doctor_busy = fields.Integer(string="Busy Doctors", compute='_compute_kpis', store=True)
+    # live from the staff roster, hence not stored
+    doctor_available = fields.Integer(string="Available Doctors", compute='_compute_doctor_availability')
+    doctor_busy = fields.Integer(string="Busy Doctors", compute='_compute_doctor_availability')
 
     # ================== Compute KPIs ==================
     @api.depends('department_id.doctor_ids', 'department_id.room_ids', 'department_id.total_capacity')
@@ -37,8 +38,6 @@ class HospitalDepartmentDashboard(models.Model):
                 total_rooms = len(dep.room_ids)
                 occupied_rooms = len([r for r in dep.room_ids if r.state == 'occupied'])
                 available_rooms = total_rooms - occupied_rooms
-                doctor_available = len([d for d in doctors if d.is_available])
-                doctor_busy = total_doctors - doctor_available
                 month_label = datetime.today().strftime("%B %Y")
 
                 rec.total_doctors = total_doctors
@@ -46,10 +45,18 @@ class HospitalDepartmentDashboard(models.Model):
                 rec.total_capacity = dep.total_capacity
                 rec.occupied_rooms = occupied_rooms
                 rec.available_rooms = available_rooms
-                rec.doctor_available = doctor_available
-                rec.doctor_busy = doctor_busy
                 rec.month = month_label
 
+    def _compute_doctor_availability(self):
+        # one roster query for every department shown
+        available = self.env['hospital.staff.roster']._get_available_staff(fields.Datetime.now())
+        available_by_dep = {}
+        for doctor in available:
+            available_by_dep[doctor.department_id.id] = available_by_dep.get(doctor.department_id.id, 0) + 1
+        for rec in self:
+            rec.doctor_available = available_by_dep.get(rec.department_id.id, 0)
+            rec.doctor_busy = rec.total_doctors - rec.doctor_available
+
 
 # ================== Department ==================
 class HospitalDepartment(models.Model):
@@ -1,36 +1,27 @@
-from odoo import models, fields, api
-from datetime import datetime
+from odoo import models, fields, api, tools
+from odoo.tools.sql import table_kind, TableKind
+
 
 class HospitalPatientDashboard(models.Model):
+    """Read-only patient analytics backed by a materialized view.
+
+    The graph/pivot views aggregate directly in PostgreSQL; the view is
+    refreshed concurrently by a cron, triggered by the transactions that
+    touched a patient, so patient writes never pay for the refresh.
+    """
     _name = 'hospital.patient.dashboard'
     _description = 'Hospital Patient Dashboard'
-    _auto = True
+    _auto = False
+    _order = 'id desc'
 
     # العلاقة مع المريض
-    patient_id = fields.Many2one('hospital.patient', string="Patient", required=True)
+    patient_id = fields.Many2one('hospital.patient', string="Patient", readonly=True)
 
     # بيانات أساسية للـ Dashboard
-    first_name = fields.Char(
-        string="First Name",
-        related='patient_id.first_name',
-        store=True
-    )
-    last_name = fields.Char(
-        string="Last Name",
-        related='patient_id.last_name',
-        store=True
-    )
-    age = fields.Integer(
-        string="Age",
-        related='patient_id.age',
-        store=True
-    )
-    gender = fields.Selection(
-        [('male','ذكر'), ('female','أنثى')],
-        string="Gender",
-        related='patient_id.gender',
-        store=True
-    )
+    first_name = fields.Char(string="First Name", readonly=True)
+    last_name = fields.Char(string="Last Name", readonly=True)
+    age = fields.Integer(string="Age", readonly=True, aggregator='avg')
+    gender = fields.Selection([('male', 'ذكر'), ('female', 'أنثى')], string="Gender", readonly=True)
     blood_type = fields.Selection(
         [
             ('a+', 'A+'), ('a-', 'A-'),
@@ -39,91 +30,110 @@ class HospitalPatientDashboard(models.Model):
             ('o+', 'O+'), ('o-', 'O-')
         ],
         string="Blood Type",
-        related='patient_id.blood_type',
-        store=True
-    )
-    phone = fields.Char(related='patient_id.phone', store=True)
-    email = fields.Char(related='patient_id.email', store=True)
-    nationality = fields.Char(related='patient_id.nationality', store=True)
-    address = fields.Char(related='patient_id.address', store=True)
-    allergies = fields.Text(related='patient_id.allergies', store=True)
-    diagnosis = fields.Text(related='patient_id.diagnosis', store=True)
-    doctor_id = fields.Many2one(related='patient_id.doctor_id', store=True)
-    total_count = fields.Integer(related='patient_id.total_count', store=True)
-    has_insurance = fields.Boolean(
-        string="Has Insurance",
-        related='patient_id.has_insurance',
-        store=True
+        readonly=True
     )
-    insurance_company = fields.Many2one(
-        'hospital.insurance',
-        string="Insurance Company",
-        related='patient_id.insurance_company',
-        store=True
-    )
-    insurance_coverage = fields.Float(related='patient_id.insurance_coverage', store=True)
-    insurance_discount = fields.Float(related='patient_id.insurance_discount', store=True)
-
-    # حقول رقمية للـ Graph
-    has_insurance_int = fields.Integer(
-        string="Insurance (Int)",
-        compute="_compute_has_insurance_int",
-        store=True
-    )
-    male_count = fields.Integer(
-        string="Male Count",
-        compute="_compute_gender_count",
-        store=True
-    )
-    female_count = fields.Integer(
-        string="Female Count",
-        compute="_compute_gender_count",
-        store=True
-    )
-
-    @api.depends('has_insurance')
-    def _compute_has_insurance_int(self):
-        for rec in self:
-            rec.has_insurance_int = 1 if rec.has_insurance else 0
-
-    @api.depends('gender')
-    def _compute_gender_count(self):
-        for rec in self:
-            rec.male_count = 1 if rec.gender == 'male' else 0
-            rec.female_count = 1 if rec.gender == 'female' else 0
+    phone = fields.Char(string="Phone", readonly=True)
+    email = fields.Char(string="Email", readonly=True)
+    nationality = fields.Char(string="Nationality", readonly=True)
+    address = fields.Char(string="Address", readonly=True)
+    allergies = fields.Text(string="Allergies", readonly=True)
+    diagnosis = fields.Text(string="Diagnosis", readonly=True)
+    doctor_id = fields.Many2one('hospital.staff', string="Doctor", readonly=True)
+    total_count = fields.Integer(string="Appointments", readonly=True)
+    has_insurance = fields.Boolean(string="Has Insurance", readonly=True)
+    insurance_company = fields.Many2one('hospital.insurance', string="Insurance Company", readonly=True)
+    insurance_coverage = fields.Float(string="Coverage (%)", readonly=True, aggregator='avg')
+    insurance_discount = fields.Float(string="Discount (%)", readonly=True, aggregator='avg')
 
-    # اختيار الشهر للفلترة أو التقارير
+    # شهر تسجيل المريض للفلترة أو التقارير
     month = fields.Selection(
         [(str(i), str(i)) for i in range(1, 13)],
         string="Month",
-        default=lambda self: str(datetime.now().month)
+        readonly=True
     )
 
+    _SYNC_PRECOMMIT_KEY = 'hospital.patient.dashboard.sync'
+
+    def _query(self):
+        return """
+            SELECT
+                p.id AS id,
+                p.id AS patient_id,
+                p.first_name,
+                p.last_name,
+                p.age,
+                p.gender,
+                p.blood_type,
+                p.phone,
+                p.email,
+                p.nationality,
+                p.address,
+                p.allergies,
+                p.diagnosis,
+                p.doctor_id,
+                p.total_count,
+                p.has_insurance,
+                p.insurance_company,
+                p.insurance_coverage,
+                p.insurance_discount,
+                to_char(p.create_date, 'FMMM') AS month
+            FROM hospital_patient p
+        """
+
+    def init(self):
+        cr = self.env.cr
+        kind = table_kind(cr, self._table)
+        if kind == TableKind.Regular:
+            # older versions stored a copy of every patient in a real table;
+            # it only duplicated hospital_patient, so nothing is lost
+            cr.execute(f"DROP TABLE {self._table} CASCADE")
+        else:
+            tools.drop_view_if_exists(cr, self._table)
+        cr.execute(f"CREATE MATERIALIZED VIEW {self._table} AS ({self._query()})")
+        # required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+        cr.execute(f"CREATE UNIQUE INDEX {self._table}_id_uniq ON {self._table} (id)")
+        cr.execute(f"CREATE INDEX {self._table}_doctor_idx ON {self._table} (doctor_id)")
+
+    # ==== Refresh ====
+    @api.model
+    def refresh_dashboard(self):
+        """Rebuild the view without blocking readers."""
+        self.env.flush_all()
+        self.env.cr.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self._table}")
+        self.invalidate_model()
+
+    @api.model
+    def _cron_refresh_dashboard(self):
+        self.refresh_dashboard()
+
+    # ==== Patient -> Dashboard synchronisation ====
     @api.model
     def update_patient_dashboard(self, patient):
-        """تحديث أو إنشاء صف Dashboard عند أي تعديل بالمريض"""
-        dashboard = self.search([('patient_id', '=', patient.id)])
-        vals = {
-            'patient_id': patient.id,
-            'first_name': patient.first_name,
-            'last_name': patient.last_name,
-            'age': patient.age,
-            'gender': patient.gender,
-            'blood_type': patient.blood_type,
-            'phone': patient.phone,
-            'email': patient.email,
-            'nationality': patient.nationality,
-            'address': patient.address,
-            'allergies': patient.allergies,
-            'diagnosis': patient.diagnosis,
-            'doctor_id': patient.doctor_id.id if patient.doctor_id else False,
-            'total_count': patient.total_count,
-            'has_insurance': patient.has_insurance,
-            'insurance_company': patient.insurance_company.id if patient.insurance_company else False,
-            'insurance_coverage': patient.insurance_coverage,
-            'insurance_discount': patient.insurance_discount
-        }
-        if dashboard:
-            dashboard.write(vals)
-        else:
-            self.create(vals)
+        """تحديث الداشبورد عند أي تعديل بالمريض"""
+        if patient:
+            self._schedule_dashboard_refresh()
+
+    @api.model
+    def _schedule_dashboard_refresh(self):
+        """Have the refresh cron rebuild the view once this transaction commits,
+        however many patients it touched. The view has no per-row refresh.
+
+        Pass ``dashboard_sync_immediate=True`` in the context to rebuild it in place,
+        or ``dashboard_sync_deferred=True`` when the caller schedules it once itself
+        at the end of a longer job.
+        """
+        if self.env.context.get('dashboard_sync_deferred'):
+            return
+        if self.env.context.get('dashboard_sync_immediate'):
+            self.refresh_dashboard()
+            return
+        data = self.env.cr.precommit.data
+        if data.get(self._SYNC_PRECOMMIT_KEY):
+            return
+        data[self._SYNC_PRECOMMIT_KEY] = True
+        cron = self.env.ref('the_healing_hms.ir_cron_refresh_patient_dashboard', raise_if_not_found=False)
+
+        @self.env.cr.precommit.add
+        def _trigger_dashboard_refresh():
+            if data.pop(self._SYNC_PRECOMMIT_KEY, None) and cron:
+                cron.sudo()._trigger()
@@ -20,8 +20,12 @@ class HospitalInsurance(models.Model):
 
     @api.depends('patient_ids')
     def _compute_patient_count(self):
+        # one grouped count for all the displayed companies
+        counts = dict(self.env['hospital.patient']._read_group(
+            [('insurance_company', 'in', self.ids)], ['insurance_company'], ['__count'],
+        ))
         for insurance in self:
-            insurance.patient_count = len(insurance.patient_ids)
+            insurance.patient_count = counts.get(insurance, 0)
 
     # Smart Button Action
     def action_view_patients(self):
@@ -27,26 +27,60 @@ class HospitalRoom(models.Model):
         ('available', 'Available'),
         ('occupied', 'Occupied'),
         ('unavailable', 'Unavailable')
-    ], string="Status", default='available')
+    ], string="Status", default='available', compute="_compute_available_beds", store=True, readonly=False,
+        help="Follows the beds occupied right now; can be set by hand until a stay starts or ends.")
 
     bed_ids = fields.One2many('hospital.bed', 'room_id', string="Beds")
     available_beds = fields.Integer(string="Available Beds", compute="_compute_available_beds", store=True)
 
+    # ===== عدادات الأسرّة (تتحدث بالفرق عند تغيير الحجوزات) =====
+    bed_count = fields.Integer(string="Beds", readonly=True, copy=False, default=0)
+    # beds occupied right now
+    booked_beds = fields.Integer(string="Booked Beds", readonly=True, copy=False, default=0)
+
     @api.depends('room_type')
     def _compute_capacity(self):
         mapping = {'single': 1, 'double': 2, 'ward': 7}
         for room in self:
             room.capacity = mapping.get(room.room_type, 1)
 
-    @api.depends('bed_ids.booking_ids.state')
+    @api.depends('bed_count', 'booked_beds')
     def _compute_available_beds(self):
         for room in self:
-            total_beds = len(room.bed_ids)
-            booked_beds = len(room.bed_ids.filtered(
-                lambda b: any(booking.state in ['confirmed', 'done'] for booking in b.booking_ids)
-            ))
-            room.available_beds = total_beds - booked_beds
-            room.state = 'occupied' if booked_beds == total_beds else 'available'
+            room.available_beds = room.bed_count - room.booked_beds
+            if not room.bed_count:
+                # nothing to count: keep the status set by hand
+                room.state = room.state or 'available'
+            elif room.booked_beds >= room.bed_count:
+                room.state = 'unavailable'
+            elif room.booked_beds > 0:
+                room.state = 'occupied'
+            else:
+                room.state = 'available'
+
+    def _recount_beds(self):
+        """Reset the bed counters of ``self`` from the beds, one grouped UPDATE."""
+        rooms = self.exists()
+        if not rooms:
+            return
+        self.env['hospital.bed'].flush_model(['room_id', 'active_booking_count'])
+        self.env.cr.execute("""
+            UPDATE hospital_room r
+               SET bed_count = COALESCE(c.bed_count, 0),
+                   booked_beds = COALESCE(c.booked_beds, 0)
+              FROM hospital_room src
+         LEFT JOIN (SELECT room_id, count(*) AS bed_count,
+                           count(*) FILTER (WHERE active_booking_count > 0) AS booked_beds
+                      FROM hospital_bed
+                     WHERE room_id IN %(ids)s
+                  GROUP BY room_id) c ON c.room_id = src.id
+             WHERE r.id = src.id AND src.id IN %(ids)s
+        """, {'ids': tuple(rooms.ids)})
+        rooms._counters_changed()
+
+    def _counters_changed(self):
+        self.invalidate_recordset(['bed_count', 'booked_beds'])
+        self.modified(['bed_count', 'booked_beds'])
 
     @api.onchange('department_id')
     def _onchange_department(self):
@@ -68,15 +102,18 @@ class HospitalRoom(models.Model):
 
     # ================== Auto-update dashboard ==================
     def _update_dashboard(self):
-        for rec in self:
-            self.env['hospital.room.dashboard'].update_room_dashboard(rec.department_id)
+        self.env['hospital.room.dashboard']._schedule_refresh(self.department_id)
 
-    def create(self, vals):
-        rec = super().create(vals)
-        rec._update_dashboard()
-        return rec
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._update_dashboard()
+        return records
 
     def write(self, vals):
+        if 'department_id' in vals:
+            # the department the room leaves loses its beds
+            self._update_dashboard()
         res = super().write(vals)
         self._update_dashboard()
         return res
@@ -95,28 +132,83 @@ class HospitalBed(models.Model):
     room_id = fields.Many2one('hospital.room', string="Room", required=True, ondelete='cascade')
     booking_ids = fields.One2many('hospital.booking', 'bed_id', string="Bookings")
     is_occupied = fields.Boolean(string="Occupied", compute="_compute_is_occupied")
+    # confirmed / invoiced stays of the bed running now, maintained by hospital.booking
+    active_booking_count = fields.Integer(string="Active Bookings", readonly=True, copy=False, default=0)
 
     @api.depends('booking_ids.state')
     def _compute_is_occupied(self):
+        now = fields.Datetime.now()
+        busy = self._get_booked_beds(now, now)
         for bed in self:
-            bed.is_occupied = any(b.state == 'confirmed' for b in bed.booking_ids)
+            bed.is_occupied = bed in busy
+
+    # ================== Availability by period ==================
+    @api.model
+    def _get_booked_beds(self, date_from, date_to):
+        """Beds with a confirmed / invoiced booking overlapping ``[date_from, date_to]``."""
+        Booking = self.env['hospital.booking']
+        Booking.flush_model(['bed_id', 'date_from', 'date_to', 'state'])
+        self.env.cr.execute("""
+            SELECT DISTINCT k.bed_id
+              FROM hospital_booking k
+             WHERE k.bed_id IS NOT NULL
+               AND k.state IN %(states)s
+               AND tsrange(k.date_from, k.date_to) && tsrange(%(from)s, %(to)s, '[]')
+        """, {'states': Booking._ACTIVE_STATES, 'from': date_from, 'to': date_to})
+        return self.browse(row[0] for row in self.env.cr.fetchall())
+
+    @api.model
+    def _get_free_beds(self, date_from, date_to, department=None, room_type=None):
+        """Beds with no confirmed / invoiced booking overlapping ``[date_from, date_to)``,
+        optionally restricted to a department and a room type; a single query."""
+        Booking = self.env['hospital.booking']
+        Booking.flush_model(['bed_id', 'date_from', 'date_to', 'state'])
+        self.flush_model(['room_id'])
+        self.env['hospital.room'].flush_model(['department_id', 'room_type'])
+        where, params = [], {'states': Booking._ACTIVE_STATES, 'from': date_from, 'to': date_to}
+        if department:
+            where.append("r.department_id = %(department)s")
+            params['department'] = getattr(department, 'id', department)
+        if room_type:
+            where.append("r.room_type = %(room_type)s")
+            params['room_type'] = room_type
+        self.env.cr.execute(f"""
+            SELECT b.id
+              FROM hospital_bed b
+              JOIN hospital_room r ON r.id = b.room_id
+             WHERE {' AND '.join(where) or 'TRUE'}
+               AND NOT EXISTS (SELECT 1 FROM hospital_booking k
+                                WHERE k.bed_id = b.id
+                                  AND k.state IN %(states)s
+                                  AND tsrange(k.date_from, k.date_to) && tsrange(%(from)s, %(to)s))
+          ORDER BY r.room_number, b.name
+        """, params)
+        return self.browse(row[0] for row in self.env.cr.fetchall())
 
     # ================== Auto-update dashboard ==================
     def _update_dashboard(self):
-        for rec in self:
-            if rec.room_id and rec.room_id.department_id:
-                self.env['hospital.room.dashboard'].update_room_dashboard(rec.room_id.department_id)
+        self.env['hospital.room.dashboard']._schedule_refresh(self.room_id.department_id)
 
-    def create(self, vals):
-        rec = super().create(vals)
-        rec._update_dashboard()
-        return rec
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records.room_id._recount_beds()
+        records._update_dashboard()
+        return records
 
     def write(self, vals):
+        rooms = self.room_id if 'room_id' in vals else self.env['hospital.room']
+        # the department of the room the bed leaves
+        rooms._update_dashboard()
         res = super().write(vals)
+        if 'room_id' in vals:
+            (rooms | self.room_id)._recount_beds()
         self._update_dashboard()
         return res
 
     def unlink(self):
+        rooms = self.room_id
         self._update_dashboard()
-        return super().unlink()
+        res = super().unlink()
+        rooms._recount_beds()
+        return res
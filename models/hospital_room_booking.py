@@ -1,8 +1,11 @@
-from odoo import models, fields, api
+from collections import Counter
+
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
 
 class HospitalBooking(models.Model):
     _name = 'hospital.booking'
+    _inherit = ['hospital.overlap.mixin']
     _description = 'Hospital Room Booking'
 
     patient_id = fields.Many2one('hospital.patient', string="Patient", required=True)
@@ -22,6 +25,8 @@ class HospitalBooking(models.Model):
 
     days = fields.Integer(string="Days", readonly=True)
     price = fields.Float(string="Total Price", readonly=True)
+    price_manual = fields.Boolean(string="Manual Price", copy=False,
+                                  help="Keep the price when the dates or the room change.")
 
     state = fields.Selection([
         ('draft', 'Draft'),
@@ -31,21 +36,88 @@ class HospitalBooking(models.Model):
     ], string="Status", default='draft')
 
     notes = fields.Text(string="Notes")
+    # the stay holds its bed in the room counters right now; kept by the booking
+    # hooks and by a cron when stays start or end
+    bed_counted = fields.Boolean(string="Counted", readonly=True, copy=False, default=False)
+
+    # ===== منع حجز نفس السرير في فترتين متداخلتين =====
+    _sql_constraints = [
+        ('date_check', 'CHECK(date_to > date_from)', 'The end of a booking must be after its start.'),
+        ('bed_no_overlap',
+         "EXCLUDE USING gist (bed_id WITH =, tsrange(date_from, date_to) WITH &&) "
+         "WHERE (bed_id IS NOT NULL AND state IN ('confirmed', 'invoiced'))",
+         'This bed is already booked during this period.'),
+    ]
+
+    _overlap_constraint = 'bed_no_overlap'
+    _overlap_resource = 'bed_id'
+    _ACTIVE_STATES = ('confirmed', 'invoiced')
+    _PERIOD_SQL = "tsrange({0}.date_from, {0}.date_to)"
+    # fields deciding whether a stay holds its bed now
+    _COUNTER_FIELDS = {'bed_id', 'state', 'date_from', 'date_to'}
+
+    @api.constrains('bed_id', 'date_from', 'date_to', 'state')
+    def _check_bed_overlap(self):
+        overlap = self._find_overlap()
+        if overlap:
+            booking, other = overlap
+            raise ValidationError(_(
+                "Bed %(bed)s is already booked from %(start)s to %(end)s.",
+                bed=booking.bed_id.name, start=other.date_from, end=other.date_to,
+            ))
 
-    @api.onchange('date_from', 'date_to', 'room_id')
+    @api.onchange('date_from', 'date_to', 'room_id', 'price_manual')
     def _onchange_price(self):
-        for rec in self:
-            rec.price = 0.0
-            if not rec.room_id:
-                rec.days = 0
-                continue
-            price_per_day = getattr(rec.room_id, 'price_per_day', 15)
-            if rec.date_from and rec.date_to:
-                delta = rec.date_to - rec.date_from
-                rec.days = delta.days + (1 if delta.seconds > 0 else 0)
+        stays = [rec._get_stay(rec.room_id) for rec in self]
+        for rec, (days, price) in zip(self, self.env['hospital.room.tariff']._price_stays(stays)):
+            rec.days = days
+            if not rec.price_manual:
+                rec.price = price
+
+    # ===== التسعير من جدول التعرفة (على السيرفر) =====
+    _PRICE_FIELDS = ('date_from', 'date_to', 'room_id', 'department_id')
+
+    def _get_stay(self, room, vals=None):
+        """``(department_id, room_type, date_from, date_to)`` for the tariff engine."""
+        vals = vals or {}
+        department_id = room.department_id.id or vals.get('department_id') or self.department_id.id
+        date_from = fields.Datetime.to_datetime(vals['date_from']) if 'date_from' in vals else self.date_from
+        date_to = fields.Datetime.to_datetime(vals['date_to']) if 'date_to' in vals else self.date_to
+        return (department_id, room.room_type, date_from, date_to)
+
+    @api.model
+    def _prepare_prices(self, vals_list):
+        """Fill ``days`` in place, and ``price`` for the vals that do not set one;
+        a price given explicitly is manual."""
+        rooms = self.env['hospital.room'].browse({vals.get('room_id') for vals in vals_list} - {None, False})
+        rooms.fetch(['department_id', 'room_type'])
+        stays = [self._get_stay(self.env['hospital.room'].browse(vals.get('room_id')), vals) for vals in vals_list]
+        for vals, (days, price) in zip(vals_list, self.env['hospital.room.tariff']._price_stays(stays)):
+            vals['days'] = days
+            if 'price' in vals:
+                vals.setdefault('price_manual', True)
             else:
-                rec.days = 0
-            rec.price = rec.days * price_per_day
+                vals['price'] = price
+        return vals_list
+
+    def _get_price_groups(self, vals):
+        """Split ``self`` by the ``days`` / ``price`` that ``vals`` gives them, so
+        they go in the same UPDATE as ``vals``: ``[(vals, bookings), ...]``.
+        ``days`` always follows the dates; invoiced bookings and manual prices
+        keep their price."""
+        manual = vals.get('price_manual')
+        room = self.env['hospital.room'].browse(vals['room_id']) if 'room_id' in vals else None
+        stays = [rec._get_stay(rec.room_id if room is None else room, vals) for rec in self]
+        # one UPDATE per distinct (days, price), price None when kept
+        groups = {}
+        for rec, (days, price) in zip(self, self.env['hospital.room.tariff']._price_stays(stays)):
+            kept = ('price' in vals or vals.get('state', rec.state) == 'invoiced'
+                    or (rec.price_manual if manual is None else manual))
+            groups.setdefault((days, None if kept else price), []).append(rec.id)
+        return [
+            (dict(vals, days=days) if price is None else dict(vals, days=days, price=price), self.browse(ids))
+            for (days, price), ids in groups.items()
+        ]
 
     @api.constrains('days')
     def _check_days(self):
@@ -53,62 +125,174 @@ class HospitalBooking(models.Model):
             if rec.days is None or rec.days <= 0:
                 raise ValidationError("Please enter a positive number of days.")
 
-    def _update_room_state(self, room):
-        total_beds = len(room.bed_ids)
-        booked_beds = len(room.bed_ids.filtered(
-            lambda b: any(booking.state in ['confirmed', 'invoiced'] for booking in b.booking_ids)
-        ))
-        if booked_beds >= total_beds:
-            room.state = 'unavailable'
-        elif booked_beds > 0:
-            room.state = 'occupied'
-        else:
-            room.state = 'available'
+    # ===== عدادات الأسرّة المحجوزة (تحديث بالفرق) =====
+    def init(self):
+        self._report_overlaps()
+        # the stays the counter cron looks at first
+        tools.create_index(self.env.cr, 'hospital_booking_bed_counted_idx', self._table, ['id'], where='bed_counted')
 
-    def _update_dashboard(self):
+    def _holds_bed(self, now):
+        """Whether the stay occupies its bed at ``now``."""
+        self.ensure_one()
+        return bool(self.bed_id) and self.state in self._ACTIVE_STATES and self.date_from <= now < self.date_to
+
+    def _get_bed_deltas(self):
+        """Return ``{bed_id: -1, ...}`` to take the counted stays of ``self`` out of the counters."""
+        deltas = Counter()
         for rec in self:
-            if rec.room_id and rec.room_id.department_id:
-                self.env['hospital.room.dashboard'].update_room_dashboard(rec.room_id.department_id)
+            if rec.bed_counted and rec.bed_id:
+                deltas[rec.bed_id.id] -= 1
+        return deltas
+
+    def _count_beds(self, deltas):
+        """Put the stays of ``self`` running now in the counters, on top of
+        ``deltas`` (the counted stays taken out before a change)."""
+        if not self:
+            self._apply_bed_deltas(deltas)
+            return
+        now = fields.Datetime.now()
+        deltas = Counter(deltas)
+        held = [rec.id for rec in self if rec._holds_bed(now)]
+        for rec in self.browse(held):
+            deltas[rec.bed_id.id] += 1
+        self.flush_recordset(['bed_counted'])
+        self.env.cr.execute(
+            "UPDATE hospital_booking SET bed_counted = (id = ANY(%s)) WHERE id IN %s",
+            [held, tuple(self.ids)],
+        )
+        self.invalidate_recordset(['bed_counted'])
+        self._apply_bed_deltas(deltas)
+        self._schedule_bed_count(now)
+
+    def _schedule_bed_count(self, now):
+        """Wake the counter cron when a stay of ``self`` starts or ends."""
+        cron = self.env.ref('the_healing_hms.ir_cron_booking_bed_counters', raise_if_not_found=False)
+        at = {
+            date
+            for rec in self if rec.bed_id and rec.state in self._ACTIVE_STATES
+            for date in (rec.date_from, rec.date_to) if date > now
+        }
+        if cron and at:
+            cron._trigger(sorted(at))
 
-    def create(self, vals):
-        rec = super().create(vals)
-        if rec.room_id:
-            self._update_room_state(rec.room_id)
-        rec._update_dashboard()
-        return rec
+    @api.model
+    def _cron_update_bed_counters(self):
+        """Count the stays that started and drop the ones that ended since the last run."""
+        now = fields.Datetime.now()
+        self.flush_model(['bed_id', 'date_from', 'date_to', 'state', 'bed_counted'])
+        self.env.cr.execute("""
+            SELECT id FROM hospital_booking WHERE bed_counted
+             UNION
+            SELECT id FROM hospital_booking
+             WHERE bed_id IS NOT NULL
+               AND state IN %(states)s
+               AND date_from <= %(now)s AND date_to > %(now)s
+        """, {'states': self._ACTIVE_STATES, 'now': now})
+        bookings = self.browse(row[0] for row in self.env.cr.fetchall())
+        bookings = bookings.filtered(lambda rec: rec.bed_counted != rec._holds_bed(now))
+        bookings._count_beds(bookings._get_bed_deltas())
+
+    @api.model
+    def _rebuild_bed_counters(self):
+        """Rebuild every bed and room counter from the stays running now."""
+        now = fields.Datetime.now()
+        cr = self.env.cr
+        self.env.flush_all()
+        cr.execute("""
+            UPDATE hospital_booking
+               SET bed_counted = (bed_id IS NOT NULL AND state IN %(states)s
+                                  AND date_from <= %(now)s AND date_to > %(now)s)
+        """, {'states': self._ACTIVE_STATES, 'now': now})
+        cr.execute("""
+            UPDATE hospital_bed b
+               SET active_booking_count = (SELECT count(*) FROM hospital_booking k
+                                            WHERE k.bed_id = b.id AND k.bed_counted)
+        """)
+        self.env.invalidate_all()
+        self.env['hospital.room'].search([])._recount_beds()
+        self.search([('bed_id', '!=', False), ('state', 'in', self._ACTIVE_STATES),
+                     ('date_to', '>', now)])._schedule_bed_count(now)
+
+    @api.model
+    def _apply_bed_deltas(self, deltas):
+        """Shift the bed counters by ``deltas`` and the room counters by the beds
+        that became booked / free: a couple of UPDATEs whatever the room size."""
+        deltas = {bed_id: delta for bed_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        cr = self.env.cr
+        self.env['hospital.bed'].flush_model(['active_booking_count', 'room_id'])
+        cr.execute("""
+            UPDATE hospital_bed b
+               SET active_booking_count = b.active_booking_count + v.delta
+              FROM (SELECT unnest(%s::int[]) AS id, unnest(%s::int[]) AS delta) v
+             WHERE b.id = v.id
+         RETURNING b.room_id, b.active_booking_count - v.delta, b.active_booking_count
+        """, [list(deltas), list(deltas.values())])
+        room_deltas = Counter()
+        for room_id, old, new in cr.fetchall():
+            room_deltas[room_id] += (new > 0) - (old > 0)
+        self.env['hospital.bed'].browse(deltas).invalidate_recordset(['active_booking_count'])
+        room_deltas = {room_id: delta for room_id, delta in room_deltas.items() if delta}
+        if not room_deltas:
+            return
+        self.env['hospital.room'].flush_model(['booked_beds'])
+        cr.execute("""
+            UPDATE hospital_room r
+               SET booked_beds = r.booked_beds + v.delta
+              FROM (SELECT unnest(%s::int[]) AS id, unnest(%s::int[]) AS delta) v
+             WHERE r.id = v.id
+        """, [list(room_deltas), list(room_deltas.values())])
+        self.env['hospital.room'].browse(room_deltas)._counters_changed()
+
+    def _update_dashboard(self):
+        self.env['hospital.room.dashboard']._schedule_refresh(self.room_id.department_id)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # one pricing pass for the whole batch
+        self._prepare_prices(vals_list)
+        records = super().create(vals_list)
+        records._count_beds({})
+        records._update_dashboard()
+        return records
 
     def write(self, vals):
-        res = super().write(vals)
-        for rec in self:
-            if rec.room_id:
-                self._update_room_state(rec.room_id)
+        tracked = bool(self._COUNTER_FIELDS & vals.keys())
+        before = self._get_bed_deltas() if tracked else Counter()
+        if 'room_id' in vals:
+            # the department of the room the booking leaves
+            self._update_dashboard()
+        if 'price' in vals:
+            vals = dict(vals, price_manual=vals.get('price_manual', True))
+        if any(fname in vals for fname in self._PRICE_FIELDS) or vals.get('price_manual') is False:
+            # days / prices go with ``vals``, so the hooks below run once
+            res = True
+            for group_vals, bookings in self._get_price_groups(vals):
+                res = super(HospitalBooking, bookings).write(group_vals)
+        else:
+            res = super().write(vals)
+        if tracked:
+            self._count_beds(before)
         self._update_dashboard()
         return res
 
     def unlink(self):
+        deltas = self._get_bed_deltas()
         self._update_dashboard()
-        return super().unlink()
+        res = super().unlink()
+        self._apply_bed_deltas(deltas)
+        return res
 
+    # write() already updates the bed counters and the dashboard
     def action_draft(self):
         self.write({'state': 'draft'})
-        for rec in self:
-            if rec.room_id:
-                self._update_room_state(rec.room_id)
-        self._update_dashboard()
 
     def action_confirm(self):
         self.write({'state': 'confirmed'})
-        for rec in self:
-            if rec.room_id:
-                self._update_room_state(rec.room_id)
-        self._update_dashboard()
 
     def action_cancel(self):
         self.write({'state': 'cancelled'})
-        for rec in self:
-            if rec.room_id:
-                self._update_room_state(rec.room_id)
-        self._update_dashboard()
 
     def action_create_invoice(self):
         for booking in self:
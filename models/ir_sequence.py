@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+
+
+class IrSequence(models.Model):
+    _inherit = 'ir.sequence'
+
+    # ===== حجز مجموعة أرقام دفعة واحدة =====
+    def _reserve_numbers(self, count):
+        """Return ``count`` formatted values of this sequence in one round trip."""
+        self.ensure_one()
+        if count <= 0:
+            return []
+        if self.use_date_range:
+            # date-range sub-sequences are resolved per call
+            return [self._next() for _i in range(count)]
+
+        cr = self.env.cr
+        if self.implementation == 'standard':
+            cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                ['ir_sequence_%03d' % self.id, count],
+            )
+            numbers = sorted(row[0] for row in cr.fetchall())
+        else:
+            cr.execute("SELECT number_next FROM ir_sequence WHERE id = %s FOR UPDATE NOWAIT", [self.id])
+            first = cr.fetchone()[0]
+            cr.execute(
+                "UPDATE ir_sequence SET number_next = number_next + %s WHERE id = %s",
+                [count * self.number_increment, self.id],
+            )
+            self.invalidate_recordset(['number_next'])
+            numbers = [first + i * self.number_increment for i in range(count)]
+        return [self.get_next_char(number) for number in numbers]
+
+    @api.model
+    def _reserve_numbers_by_code(self, sequence_code, count):
+        """Same as :meth:`next_by_code`, but for ``count`` values at once.
+
+        Returns an empty list when no sequence matches the code.
+        """
+        self.check_access('read')
+        company_id = self.env.company.id
+        seq = self.search([
+            ('code', '=', sequence_code),
+            ('company_id', 'in', [company_id, False]),
+        ], order='company_id', limit=1)
+        if not seq:
+            return []
+        return seq._reserve_numbers(count)
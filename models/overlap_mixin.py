@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import models
+from odoo.tools import SQL
+from odoo.tools.sql import constraint_definition
+
+_logger = logging.getLogger(__name__)
+
+
+class HospitalOverlapMixin(models.AbstractModel):
+    """No two active periods of the same resource may overlap.
+
+    The rule itself is a GiST exclusion constraint declared in the
+    ``_sql_constraints`` of the model, under ``_overlap_constraint``; this
+    mixin provides what goes around it. Models set:
+
+    * ``_overlap_resource``: the many2one column that cannot be double-booked
+    * ``_PERIOD_SQL``: the period as an SQL template, ``{0}`` being the table
+      alias; it must stay in sync with the constraint
+    * ``_ACTIVE_STATES``: the states the constraint applies to
+    """
+    _name = 'hospital.overlap.mixin'
+    _description = 'Overlap Exclusion Constraint'
+
+    _overlap_constraint = None
+    _overlap_resource = None
+    _PERIOD_SQL = None
+    _ACTIVE_STATES = ()
+
+    def _auto_init(self):
+        if self._overlap_constraint:
+            # a many2one WITH = inside a GiST exclusion constraint needs btree_gist
+            self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        return super()._auto_init()
+
+    def _overlap_query(self, where, limit):
+        resource = SQL.identifier(self._overlap_resource)
+        return SQL(
+            """
+            SELECT a.%(resource)s, a.id, b.id
+              FROM %(table)s a
+              JOIN %(table)s b
+                ON b.%(resource)s = a.%(resource)s
+               AND b.id != a.id
+               AND b.state IN %(states)s
+               AND %(period_b)s && %(period_a)s
+             WHERE a.state IN %(states)s
+               AND %(where)s
+          ORDER BY a.%(resource)s, a.id
+             LIMIT %(limit)s
+            """,
+            resource=resource,
+            table=SQL.identifier(self._table),
+            states=tuple(self._ACTIVE_STATES),
+            period_a=SQL(self._PERIOD_SQL.format('a')),
+            period_b=SQL(self._PERIOD_SQL.format('b')),
+            where=where,
+            limit=limit,
+        )
+
+    def _report_overlaps(self):
+        """Overlapping rows already in the table prevent the exclusion constraint
+        from being created, and Odoo only logs it: list them."""
+        cr = self.env.cr
+        if constraint_definition(cr, self._table, f'{self._table}_{self._overlap_constraint}'):
+            return
+        cr.execute(self._overlap_query(SQL("b.id > a.id"), 100))
+        overlaps = cr.fetchall()
+        if overlaps:
+            _logger.error(
+                "Constraint %s could not be created: overlapping active %s records "
+                "(%s, id, id) must be cancelled or moved, then the module updated again. First %s: %s",
+                self._overlap_constraint, self._name, self._overlap_resource, len(overlaps), overlaps,
+            )
+
+    def _find_overlap(self):
+        """Return ``(record, other)``, a record of ``self`` and one it overlaps, or ``None``.
+
+        Readable errors for the exclusion constraint, one query for the whole batch.
+        """
+        if not self:
+            return None
+        self.flush_model()
+        self.env.cr.execute(self._overlap_query(SQL("a.id IN %s", tuple(self.ids)), 1))
+        row = self.env.cr.fetchone()
+        return row and (self.browse(row[1]), self.browse(row[2]))
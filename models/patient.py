@@ -1,19 +1,25 @@
 # -*- coding: utf-8 -*-
+import psycopg2
+
 from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL, mute_logger
 from datetime import datetime
+import calendar
 
 class Patient(models.Model):
     _name = "hospital.patient"
     _description = "Hospital Patient"
+    _rec_names_search = ['name', 'patient_code', 'phone', 'email']
 
     # ==== Basic Info ====
-    patient_code = fields.Char(string="Patient Code", copy=False, readonly=True, index=True)
+    patient_code = fields.Char(string="Patient Code", copy=False, readonly=True, index='trigram')
     first_name = fields.Char(string="First Name", required=True)
     last_name = fields.Char(string="Last Name", required=True)
-    name = fields.Char(string="Full Name", compute="_compute_name", store=True)
-    phone = fields.Char(string="Phone")
-    email = fields.Char(string="Email")
-    total_count = fields.Integer(string="Total Count", compute="_compute_total_count", store=True)
+    name = fields.Char(string="Full Name", compute="_compute_name", store=True, index='trigram')
+    phone = fields.Char(string="Phone", index='trigram')
+    email = fields.Char(string="Email", index='trigram')
+    total_count = fields.Integer(string="Total Count", readonly=True, copy=False, default=0)
     nationality = fields.Char(string="Nationality")
     dob = fields.Date(string="Date of Birth")
     age = fields.Integer(string="Age", compute="_compute_age", store=True)
@@ -30,12 +36,12 @@ class Patient(models.Model):
     # ==== Relationships ====
     appointment_ids = fields.One2many("hospital.appointment", "patient_id", string="Appointments")
     diagnosis = fields.Text(string='Diagnosis')
-    doctor_id = fields.Many2one('hospital.staff', string="Doctor", domain=[('job_title','=','doctor')])
+    doctor_id = fields.Many2one('hospital.staff', string="Doctor", domain=[('job_title','=','doctor')], index='btree_not_null')
     partner_id = fields.Many2one('res.partner', string='Related Partner')
     prescription_ids = fields.One2many("hospital.prescription", "patient_id", string="Prescriptions")
 
     # ==== Insurance Fields ====
-    insurance_company = fields.Many2one('hospital.insurance', string="Insurance Company")
+    insurance_company = fields.Many2one('hospital.insurance', string="Insurance Company", index='btree_not_null')
     insurance_coverage = fields.Float(
         string="Coverage (%)",
         default=0.0,
@@ -89,37 +95,269 @@ class Patient(models.Model):
             else:
                 patient.insurance_discount = 0.0
 
-    @api.depends('appointment_ids')
-    def _compute_total_count(self):
-        for rec in self:
-            rec.total_count = len(rec.appointment_ids)
+    # ==== Appointment counter (maintained by hospital.appointment) ====
+    def _update_appointment_counts(self):
+        """Recount the appointments of ``self`` with one grouped query."""
+        patients = self.exists()
+        if not patients:
+            return
+        self.env['hospital.appointment'].flush_model(['patient_id'])
+        self.env.cr.execute("""
+            UPDATE hospital_patient p
+               SET total_count = COALESCE(c.cnt, 0)
+              FROM hospital_patient src
+         LEFT JOIN (SELECT patient_id, count(*) AS cnt
+                      FROM hospital_appointment
+                     WHERE patient_id IN %(ids)s
+                  GROUP BY patient_id) c ON c.patient_id = src.id
+             WHERE p.id = src.id
+               AND src.id IN %(ids)s
+               AND p.total_count IS DISTINCT FROM COALESCE(c.cnt, 0)
+        """, {'ids': tuple(patients.ids)})
+        if self.env.cr.rowcount:
+            patients.invalidate_recordset(['total_count'])
+            self.env['hospital.patient.dashboard']._schedule_dashboard_refresh()
+
+    # ==== Birthday index (used by the nightly age rollover) ====
+    _DOB_MONTH_DAY = "(EXTRACT(MONTH FROM dob) * 100 + EXTRACT(DAY FROM dob))"
+
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE INDEX IF NOT EXISTS hospital_patient_dob_month_day_idx
+            ON hospital_patient ({self._DOB_MONTH_DAY})
+            WHERE dob IS NOT NULL
+        """)
+        # incremental duplicate detection picks the patients changed since its last run
+        self.env.cr.execute(
+            "CREATE INDEX IF NOT EXISTS hospital_patient_write_date_idx ON hospital_patient (write_date)")
+
+    # ==== CRON: Age Rollover ====
+    @api.model
+    def _cron_rollover_ages(self, date=None):
+        """Recompute the stored age of the patients whose birthday is today.
+
+        Only the matching rows are touched, through the month/day index;
+        patients born on Feb 29 roll over on Mar 1 in non-leap years.
+        """
+        today = date or fields.Date.context_today(self)
+        month_days = [today.month * 100 + today.day]
+        if (today.month, today.day) == (3, 1) and not calendar.isleap(today.year):
+            month_days.append(229)
+
+        self.flush_model(['dob', 'age'])
+        self.env.cr.execute(f"""
+            UPDATE hospital_patient
+               SET age = date_part('year', age(%(today)s::date, dob))::int
+             WHERE dob IS NOT NULL
+               AND {self._DOB_MONTH_DAY} IN %(month_days)s
+               AND age IS DISTINCT FROM date_part('year', age(%(today)s::date, dob))::int
+         RETURNING id
+        """, {'today': today, 'month_days': tuple(month_days)})
+        patient_ids = [row[0] for row in self.env.cr.fetchall()]
+        if patient_ids:
+            self.invalidate_model(['age'])
+            # the refresh cron rebuilds the age buckets right after this job commits
+            self.env['hospital.patient.dashboard']._schedule_dashboard_refresh()
+        return len(patient_ids)
+
+    # ==== Fuzzy Search (Reception) ====
+    _FUZZY_SEARCH_FIELDS = ('name', 'patient_code', 'phone', 'email')
+
+    @api.model
+    def name_search(self, name='', domain=None, operator='ilike', limit=100):
+        """Rank patients by trigram similarity on name, code, phone and email.
+
+        Typos are tolerated through pg_trgm word similarity; the GIN trigram
+        indexes on the four columns serve the match, and only the matching
+        candidates are ranked.
+        """
+        name = (name or '').strip()
+        if not name or operator != 'ilike' or not self.env.registry.has_trigram:
+            return super().name_search(name, domain=domain, operator=operator, limit=limit)
+
+        ranked_ids = self._search_fuzzy_ids(name, domain=domain, limit=limit)
+        if not ranked_ids:
+            return super().name_search(name, domain=domain, operator=operator, limit=limit)
+        return [(rec.id, rec.display_name) for rec in self.browse(ranked_ids).sudo()]
+
+    @api.model
+    def _search_fuzzy_ids(self, text, domain=None, limit=100):
+        """Return the ids matching ``domain`` (and record rules), best match first."""
+        self.flush_model(self._FUZZY_SEARCH_FIELDS)
+        query = self._search(domain or [])
+        if query.is_empty():
+            return []
+        columns = [SQL.identifier(self._table, fname) for fname in self._FUZZY_SEARCH_FIELDS]
+        # "<%" is index-backed: the trigram indexes produce the candidates
+        query.add_where(SQL("(%s)", SQL(" OR ").join(SQL("%s <%% %s", text, column) for column in columns)))
+        query.order = SQL(
+            "GREATEST(%s) DESC, %s DESC",
+            SQL(", ").join(SQL("word_similarity(%s, %s)", text, column) for column in columns),
+            SQL.identifier(self._table, 'id'),
+        )
+        query.limit = limit
+        return list(query.get_result_ids())
 
     # ==== OVERRIDE CREATE ====
     @api.model_create_multi
     def create(self, vals_list):
+        # توليد patient_code إذا غير موجود (حجز الأرقام دفعة واحدة)
+        missing = [vals for vals in vals_list if not vals.get('patient_code')]
+        if missing:
+            codes = self.env['ir.sequence'].sudo()._reserve_numbers_by_code('hospital.patient', len(missing))
+            for index, vals in enumerate(missing):
+                vals['patient_code'] = codes[index] if index < len(codes) else _('New')
         patients = super(Patient, self).create(vals_list)
-        for patient in patients:
-            # توليد patient_code إذا غير موجود
-            if not patient.patient_code:
-                patient.patient_code = self.env['ir.sequence'].next_by_code('hospital.patient') or _('New')
-            # تحديث الداشبورد
-            self.env['hospital.patient.dashboard'].update_patient_dashboard(patient)
+        # تحديث الداشبورد (مرة واحدة قبل الـ commit)
+        self.env['hospital.patient.dashboard']._schedule_dashboard_refresh()
         return patients
 
     # ==== OVERRIDE WRITE ====
     def write(self, vals):
         res = super().write(vals)
-        for rec in self:
-            self.env['hospital.patient.dashboard'].update_patient_dashboard(rec)
+        if self:
+            self.env['hospital.patient.dashboard']._schedule_dashboard_refresh()
         return res
 
     # ==== OVERRIDE UNLINK ====
     def unlink(self):
-        for rec in self:
-            dash = self.env['hospital.patient.dashboard'].search([('patient_id','=',rec.id)])
-            dash.unlink()
+        if self:
+            self.env['hospital.patient.dashboard']._schedule_dashboard_refresh()
         return super().unlink()
 
+    # ==== MERGE ====
+    # tables rebuilt from scratch for the surviving patient instead of re-pointed
+    # (history snapshots of the merged patients are stale: deleted with them)
+    _MERGE_SKIP_MODELS = ('hospital.patient.block', 'hospital.patient.duplicate', 'hospital.patient.history.snapshot')
+    # empty fields of the surviving patient are filled from the merged ones
+    _MERGE_FILL_FIELDS = (
+        'phone', 'email', 'nationality', 'dob', 'gender', 'blood_type', 'allergies',
+        'address', 'diagnosis', 'doctor_id', 'partner_id', 'insurance_company',
+    )
+
+    def _get_patient_references(self):
+        """Return the stored many2one / many2many fields pointing to hospital.patient."""
+        references = []
+        for model_name in self.env.registry:
+            model = self.env[model_name]
+            if model._abstract or not model._auto or model_name in self._MERGE_SKIP_MODELS:
+                continue
+            for field in model._fields.values():
+                if field.comodel_name == self._name and field.store and field.type in ('many2one', 'many2many'):
+                    references.append(field)
+        return references
+
+    def _merge_into(self, target):
+        """Fold the patients of ``self`` into ``target`` in the current transaction.
+
+        Every reference to the merged patients is re-pointed with one UPDATE
+        per column; the re-pointed records are then marked as modified, so the
+        stored fields depending on the patient (related partner, counters...)
+        are recomputed by the ORM.
+        """
+        target.ensure_one()
+        sources = self - target
+        if not sources:
+            return target
+        # the references are re-pointed in SQL: check the rights before touching anything
+        sources.check_access('unlink')
+        target.check_access('write')
+        self.env.flush_all()
+        cr = self.env.cr
+        source_ids = tuple(sources.ids)
+        cr.execute("SELECT id FROM hospital_patient WHERE id IN %s FOR UPDATE", [source_ids + (target.id,)])
+
+        repointed = []
+        for field in self._get_patient_references():
+            if field.type == 'many2one':
+                record_ids = self._merge_many2one(field, source_ids, target.id)
+            else:
+                record_ids = self._merge_many2many(field, source_ids, target.id)
+            if record_ids:
+                repointed.append((self.env[field.model_name].browse(record_ids), field.name))
+        cr.execute("""
+            UPDATE ir_attachment SET res_id = %s
+             WHERE res_model = %s AND res_id IN %s AND res_field IS NULL
+        """, [target.id, self._name, source_ids])
+        self.env.invalidate_all()
+        for records, fname in repointed:
+            records.modified([fname])
+        # recompute while the merged patients still exist
+        self.env.flush_all()
+
+        fill = {}
+        for fname in self._MERGE_FILL_FIELDS:
+            if not target[fname]:
+                value = next((source[fname] for source in sources if source[fname]), False)
+                if value:
+                    fill[fname] = value.id if isinstance(value, models.BaseModel) else value
+        sources.unlink()
+        if fill:
+            target.write(fill)
+
+        # derived counters of the surviving patient
+        target._update_appointment_counts()
+        # the duplicate pairs of the merged patients went with them: look again for the survivor
+        self.env['hospital.patient.duplicate'].sudo()._detect_duplicates(target.ids)
+        self.env['hospital.patient.dashboard']._schedule_dashboard_refresh()
+        return target
+
+    def _merge_many2one(self, field, source_ids, target_id):
+        """Re-point a many2one column to ``target_id``; return the updated ids.
+
+        Rows that would break a unique constraint once re-pointed are dropped,
+        like the partner merge wizard does.
+        """
+        cr = self.env.cr
+        table = self.env[field.model_name]._table
+        column = field.name
+        try:
+            with mute_logger('odoo.sql_db'), cr.savepoint():
+                cr.execute(
+                    f'UPDATE "{table}" SET "{column}" = %s WHERE "{column}" IN %s RETURNING id',
+                    [target_id, source_ids],
+                )
+                return [row[0] for row in cr.fetchall()]
+        except psycopg2.errors.UniqueViolation:
+            pass
+        # a unique constraint involves the column: keep the rows that fit
+        cr.execute(f'SELECT id FROM "{table}" WHERE "{column}" IN %s', [source_ids])
+        updated = []
+        for (row_id,) in cr.fetchall():
+            try:
+                with mute_logger('odoo.sql_db'), cr.savepoint():
+                    cr.execute(f'UPDATE "{table}" SET "{column}" = %s WHERE id = %s', [target_id, row_id])
+                updated.append(row_id)
+            except psycopg2.errors.UniqueViolation:
+                cr.execute(f'DELETE FROM "{table}" WHERE id = %s', [row_id])
+        return updated
+
+    def _merge_many2many(self, field, source_ids, target_id):
+        """Move many2many links to ``target_id``; return the ids of the linked records."""
+        cr = self.env.cr
+        rel, col1, col2 = field.relation, field.column1, field.column2
+        # DISTINCT: two merged patients may share a link
+        cr.execute(f"""
+            INSERT INTO "{rel}" ("{col1}", "{col2}")
+            SELECT DISTINCT "{col1}", %(target)s FROM "{rel}" WHERE "{col2}" IN %(sources)s
+            ON CONFLICT DO NOTHING
+        """, {'target': target_id, 'sources': source_ids})
+        cr.execute(f'DELETE FROM "{rel}" WHERE "{col2}" IN %s RETURNING "{col1}"', [source_ids])
+        return list({row[0] for row in cr.fetchall()})
+
+    def action_merge_patients(self):
+        """Merge the selected patients into the oldest one."""
+        if len(self) < 2:
+            raise UserError(_("Select at least two patients to merge."))
+        target = self.sorted('id')[:1]
+        self._merge_into(target)
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'view_mode': 'form',
+            'res_id': target.id,
+        }
+
     # ==== ACTIONS ====
     def action_print_medical_record(self):
         return self.env.ref('the_healing_hms.action_report_medical_record').report_action(self)
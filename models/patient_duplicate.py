@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+import difflib
+import re
+import unicodedata
+from datetime import timedelta
+
+from odoo import models, fields, api, tools
+
+
+class HospitalPatientBlock(models.Model):
+    """Blocking keys of a patient: only patients sharing a key are compared."""
+    _name = 'hospital.patient.block'
+    _description = 'Patient Duplicate Blocking Key'
+    _log_access = False
+
+    patient_id = fields.Many2one('hospital.patient', string="Patient", required=True, ondelete='cascade', index=True)
+    key_type = fields.Selection([
+        ('phone', 'Phone'),
+        ('email', 'Email'),
+        ('name_dob', 'Name + Date of Birth'),
+    ], string="Key Type", required=True)
+    key = fields.Char(string="Key", required=True)
+
+    def init(self):
+        tools.create_index(self.env.cr, 'hospital_patient_block_key_idx', self._table, ['key_type', 'key'])
+
+
+class HospitalPatientDuplicate(models.Model):
+    """Review queue of probable duplicate patients (``patient_a_id`` < ``patient_b_id``)."""
+    _name = 'hospital.patient.duplicate'
+    _description = 'Possible Duplicate Patient'
+    _order = 'state, score desc, id desc'
+
+    patient_a_id = fields.Many2one('hospital.patient', string="Patient", required=True, ondelete='cascade', index=True)
+    patient_b_id = fields.Many2one('hospital.patient', string="Possible Duplicate", required=True, ondelete='cascade', index=True)
+    score = fields.Float(string="Score", digits=(3, 2))
+    match_keys = fields.Char(string="Matched On")
+    state = fields.Selection([
+        ('pending', 'To Review'),
+        ('dismissed', 'Not a Duplicate'),
+    ], string="Status", default='pending', required=True)
+
+    _sql_constraints = [
+        ('unique_pair', 'unique(patient_a_id, patient_b_id)', 'This pair of patients is already in the review queue.'),
+        ('ordered_pair', 'CHECK(patient_a_id < patient_b_id)', 'A duplicate pair must reference two different patients.'),
+    ]
+
+    _LAST_RUN_PARAM = 'the_healing_hms.duplicate_detection_last_run'
+    _BATCH_SIZE = 5000
+    # write_date is the start of the writing transaction, which may commit after
+    # a run started: the next run looks back this much further
+    _WATERMARK_OVERLAP = timedelta(hours=1)
+    # keys shared by more patients than this (family phone, clinic email...) carry no signal
+    _MAX_BLOCK_SIZE = 50
+    _MIN_SCORE = 0.5
+    _KEY_WEIGHTS = {'phone': 0.35, 'email': 0.35, 'name_dob': 0.5}
+    _NAME_WEIGHT = 0.3
+
+    # ================== Actions ==================
+    def action_dismiss(self):
+        self.write({'state': 'dismissed'})
+
+    def action_reopen(self):
+        self.write({'state': 'pending'})
+
+    def action_merge(self):
+        """Fold the newer patient of the pair into the older one."""
+        self.ensure_one()
+        target = self.patient_a_id
+        (self.patient_a_id | self.patient_b_id)._merge_into(target)
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'hospital.patient',
+            'view_mode': 'form',
+            'res_id': target.id,
+        }
+
+    # ================== Blocking keys ==================
+    @api.model
+    def _normalize_name(self, name):
+        name = unicodedata.normalize('NFKD', name or '')
+        name = ''.join(c for c in name if not unicodedata.combining(c)).lower()
+        return ' '.join(sorted(re.findall(r'\w+', name)))
+
+    @api.model
+    def _blocking_keys(self, patient):
+        """Return ``[(key_type, key)]`` for a dict of patient values."""
+        keys = []
+        phone = re.sub(r'\D', '', patient['phone'] or '')
+        if len(phone) >= 7:
+            # ignore country / trunk prefixes
+            keys.append(('phone', phone[-9:]))
+        email = (patient['email'] or '').strip().lower()
+        if '@' in email:
+            keys.append(('email', email))
+        name = self._normalize_name(patient['name'])
+        if name and patient['dob']:
+            keys.append(('name_dob', f"{name}|{patient['dob']}"))
+        return keys
+
+    # ================== Detection ==================
+    @api.model
+    def _cron_detect_duplicates(self):
+        """Incremental run: only patients changed since the previous run are compared."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        last_run = ICP.get_param(self._LAST_RUN_PARAM)
+        # transaction time, like write_date (the batches below commit: take it first)
+        started = self.env.cr.now() - self._WATERMARK_OVERLAP
+        domain = [('write_date', '>=', last_run)] if last_run else []
+        patient_ids = self.env['hospital.patient'].search(domain, order='id').ids
+        for batch in tools.split_every(self._BATCH_SIZE, patient_ids, list):
+            self._detect_duplicates(batch)
+            self.env.cr.commit()
+        ICP.set_param(self._LAST_RUN_PARAM, fields.Datetime.to_string(started))
+
+    @api.model
+    def _detect_duplicates(self, patient_ids):
+        if not patient_ids:
+            return
+        self._rebuild_blocking_keys(patient_ids)
+        candidates = self._find_candidate_pairs(patient_ids)
+        scored = self._score_pairs(candidates)
+
+        existing = self.search([
+            '|', ('patient_a_id', 'in', patient_ids), ('patient_b_id', 'in', patient_ids),
+        ])
+        by_pair = {(dup.patient_a_id.id, dup.patient_b_id.id): dup for dup in existing}
+        # pairs that no longer match leave the queue (reviewed ones are kept)
+        existing.filtered(
+            lambda d: d.state == 'pending' and (d.patient_a_id.id, d.patient_b_id.id) not in scored
+        ).unlink()
+
+        to_create = []
+        for pair, (score, match_keys) in scored.items():
+            dup = by_pair.get(pair)
+            if not dup:
+                to_create.append({
+                    'patient_a_id': pair[0],
+                    'patient_b_id': pair[1],
+                    'score': score,
+                    'match_keys': match_keys,
+                })
+            elif dup.state == 'pending' and (dup.score, dup.match_keys) != (score, match_keys):
+                dup.write({'score': score, 'match_keys': match_keys})
+        self.create(to_create)
+
+    @api.model
+    def _rebuild_blocking_keys(self, patient_ids):
+        Block = self.env['hospital.patient.block']
+        Block.search([('patient_id', 'in', patient_ids)]).unlink()
+        patients = self.env['hospital.patient'].browse(patient_ids).read(['name', 'phone', 'email', 'dob'])
+        Block.create([
+            {'patient_id': patient['id'], 'key_type': key_type, 'key': key}
+            for patient in patients
+            for key_type, key in self._blocking_keys(patient)
+        ])
+
+    @api.model
+    def _find_candidate_pairs(self, patient_ids):
+        """Return ``{(patient_a, patient_b): [key_type, ...]}`` for pairs sharing a block."""
+        self.env['hospital.patient.block'].flush_model()
+        self.env.cr.execute("""
+            WITH blocks AS (
+                SELECT key_type, key
+                  FROM hospital_patient_block
+                 WHERE patient_id IN %(ids)s
+              GROUP BY key_type, key
+            ), small_blocks AS (
+                SELECT b.key_type, b.key
+                  FROM blocks b
+                  JOIN hospital_patient_block m ON m.key_type = b.key_type AND m.key = b.key
+              GROUP BY b.key_type, b.key
+                HAVING count(*) BETWEEN 2 AND %(max_size)s
+            )
+            SELECT LEAST(a.patient_id, o.patient_id),
+                   GREATEST(a.patient_id, o.patient_id),
+                   array_agg(DISTINCT a.key_type)
+              FROM hospital_patient_block a
+              JOIN small_blocks s ON s.key_type = a.key_type AND s.key = a.key
+              JOIN hospital_patient_block o ON o.key_type = a.key_type AND o.key = a.key
+                                           AND o.patient_id != a.patient_id
+             WHERE a.patient_id IN %(ids)s
+          GROUP BY 1, 2
+        """, {'ids': tuple(patient_ids), 'max_size': self._MAX_BLOCK_SIZE})
+        return {(a, b): key_types for a, b, key_types in self.env.cr.fetchall()}
+
+    @api.model
+    def _score_pairs(self, candidates):
+        """Return ``{pair: (score, match_keys)}`` for the pairs above the threshold."""
+        patient_ids = {pid for pair in candidates for pid in pair}
+        names = {
+            patient['id']: self._normalize_name(patient['name'])
+            for patient in self.env['hospital.patient'].browse(patient_ids).read(['name'])
+        }
+        labels = dict(self.env['hospital.patient.block']._fields['key_type'].selection)
+        scored = {}
+        for (a, b), key_types in candidates.items():
+            score = sum(self._KEY_WEIGHTS[key_type] for key_type in key_types)
+            score += self._NAME_WEIGHT * difflib.SequenceMatcher(None, names[a], names[b]).ratio()
+            score = min(score, 1.0)
+            if score >= self._MIN_SCORE:
+                match_keys = ', '.join(labels[key_type] for key_type in sorted(key_types))
+                scored[(a, b)] = (round(score, 2), match_keys)
+        return scored
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo import models, fields, api
+
+
+class HospitalPatientHistorySnapshot(models.Model):
+    """Cached timeline of a patient, keyed by its history stamp.
+
+    Rows are written with plain SQL from the read paths: showing a history
+    never writes nor locks the patient itself. Snapshots are complete and
+    shared between users; :meth:`Patient._get_history` filters them.
+    """
+    _name = 'hospital.patient.history.snapshot'
+    _description = 'Patient History Snapshot'
+    _log_access = False
+
+    patient_id = fields.Many2one('hospital.patient', string="Patient", required=True, ondelete='cascade', index=True)
+    stamp = fields.Char(string="History Stamp", required=True)
+    history = fields.Json(string="History")
+
+    _sql_constraints = [
+        ('patient_stamp_uniq', 'unique(patient_id, stamp)', 'A history snapshot is stored once per stamp.'),
+    ]
+
+
+class Patient(models.Model):
+    _inherit = "hospital.patient"
+
+    # records shown in each section of the history
+    _HISTORY_SECTIONS = {
+        'prescriptions': 'hospital.prescription',
+        'lab_results': 'hospital.lab.result',
+        'appointments': 'hospital.appointment',
+        'billings': 'hospital.billing',
+    }
+
+    def _get_history_stamps(self):
+        """Return ``{patient_id: stamp}``; the stamp changes whenever the patient
+        or one of the records shown in their history is created, edited or deleted."""
+        if not self:
+            return {}
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT patient_id, string_agg(tag || ':' || cnt || ':' || COALESCE(last::text, ''), '|' ORDER BY tag)
+              FROM (
+                    SELECT 'patient' AS tag, id AS patient_id, 1 AS cnt, write_date AS last
+                      FROM hospital_patient WHERE id IN %(ids)s
+                 UNION ALL
+                    SELECT 'prescription', patient_id, count(*), max(write_date)
+                      FROM hospital_prescription WHERE patient_id IN %(ids)s GROUP BY patient_id
+                 UNION ALL
+                    SELECT 'prescription_line', p.patient_id, count(*), max(l.write_date)
+                      FROM hospital_prescription_line l
+                      JOIN hospital_prescription p ON p.id = l.prescription_id
+                     WHERE p.patient_id IN %(ids)s GROUP BY p.patient_id
+                 UNION ALL
+                    SELECT 'appointment', patient_id, count(*), max(write_date)
+                      FROM hospital_appointment WHERE patient_id IN %(ids)s GROUP BY patient_id
+                 UNION ALL
+                    SELECT 'billing', patient_id, count(*), max(write_date)
+                      FROM hospital_billing WHERE patient_id IN %(ids)s GROUP BY patient_id
+                 UNION ALL
+                    SELECT 'lab_request', patient_id, count(*), max(write_date)
+                      FROM hospital_lab_request WHERE patient_id IN %(ids)s GROUP BY patient_id
+                 UNION ALL
+                    SELECT 'lab_result', r.patient_id, count(*), max(res.write_date)
+                      FROM hospital_lab_result res
+                      JOIN hospital_lab_request r ON r.id = res.request_id
+                     WHERE r.patient_id IN %(ids)s GROUP BY r.patient_id
+                 UNION ALL
+                    SELECT 'lab_result_line', r.patient_id, count(*), max(l.write_date)
+                      FROM hospital_lab_result_line l
+                      JOIN hospital_lab_result res ON res.id = l.result_id
+                      JOIN hospital_lab_request r ON r.id = res.request_id
+                     WHERE r.patient_id IN %(ids)s GROUP BY r.patient_id
+              ) parts
+          GROUP BY patient_id
+        """, {'ids': tuple(self.ids)})
+        return dict(self.env.cr.fetchall())
+
+    def _get_history(self):
+        """Return ``{patient_id: history}`` restricted to the records the
+        current user may read; this is what views and reports display."""
+        snapshots = self._get_history_snapshot()
+        readable = {}
+        for section, model_name in self._HISTORY_SECTIONS.items():
+            ids = {item['id'] for history in snapshots.values() for item in history[section]}
+            readable[section] = set(self.env[model_name].browse(ids)._filtered_access('read').ids)
+        return {
+            patient_id: dict(history, **{
+                section: [item for item in history[section] if item['id'] in readable[section]]
+                for section in self._HISTORY_SECTIONS
+            })
+            for patient_id, history in snapshots.items()
+        }
+
+    def _get_history_snapshot(self, stamps=None):
+        """Return ``{patient_id: history}``, rebuilding only the stale snapshots.
+
+        Snapshots hold every record, whoever built them: do not show them
+        without going through :meth:`_get_history`.
+        """
+        if not self:
+            return {}
+        if stamps is None:
+            stamps = self._get_history_stamps()
+        cr = self.env.cr
+        cr.execute(
+            "SELECT patient_id, stamp, history FROM hospital_patient_history_snapshot WHERE patient_id IN %s",
+            [tuple(self.ids)],
+        )
+        snapshots = {
+            patient_id: history
+            for patient_id, stamp, history in cr.fetchall()
+            if stamp == stamps.get(patient_id)
+        }
+        stale = self.browse(patient_id for patient_id in self.ids if patient_id not in snapshots)
+        if stale:
+            fresh = stale.sudo()._load_history()
+            cr.execute("DELETE FROM hospital_patient_history_snapshot WHERE patient_id IN %s", [tuple(stale.ids)])
+            for patient_id, snapshot in fresh.items():
+                cr.execute("""
+                    INSERT INTO hospital_patient_history_snapshot (patient_id, stamp, history)
+                    VALUES (%s, %s, %s::jsonb)
+                    ON CONFLICT (patient_id, stamp) DO NOTHING
+                """, [patient_id, stamps.get(patient_id), json.dumps(snapshot)])
+            snapshots.update(fresh)
+        return snapshots
+
+    def _load_history(self):
+        """Load the whole timeline of the patients in a fixed number of queries."""
+        to_string = fields.Datetime.to_string
+        histories = {
+            patient['id']: {
+                'patient': {
+                    'patient_code': patient['patient_code'],
+                    'name': patient['name'],
+                    'dob': fields.Date.to_string(patient['dob']),
+                    'gender': patient['gender'],
+                    'blood_type': patient['blood_type'],
+                    'phone': patient['phone'],
+                    'email': patient['email'],
+                    'address': patient['address'],
+                    'nationality': patient['nationality'],
+                    'doctor': patient['doctor_id'] and patient['doctor_id'][1],
+                },
+                'prescriptions': [],
+                'lab_results': [],
+                'appointments': [],
+                'billings': [],
+            }
+            for patient in self.read([
+                'patient_code', 'name', 'dob', 'gender', 'blood_type', 'phone',
+                'email', 'address', 'nationality', 'doctor_id',
+            ])
+        }
+
+        # ---- Prescriptions + lines ----
+        prescriptions = self.env['hospital.prescription'].search(
+            [('patient_id', 'in', self.ids)], order='date desc, id desc')
+        lines = {}
+        for line in prescriptions.line_ids.read(
+                ['prescription_id', 'medicine_name', 'medicine_form', 'dosage', 'times_per_day', 'duration']):
+            lines.setdefault(line['prescription_id'][0], []).append({
+                'medicine_name': line['medicine_name'],
+                'medicine_form': line['medicine_form'],
+                'dosage': line['dosage'],
+                'times_per_day': line['times_per_day'],
+                'duration': line['duration'],
+            })
+        for presc in prescriptions.read(['patient_id', 'name', 'date', 'doctor_id', 'state']):
+            histories[presc['patient_id'][0]]['prescriptions'].append({
+                'id': presc['id'],
+                'name': presc['name'],
+                'date': to_string(presc['date']),
+                'doctor': presc['doctor_id'] and presc['doctor_id'][1],
+                'state': presc['state'],
+                'lines': lines.get(presc['id'], []),
+            })
+
+        # ---- Lab results + lines ----
+        results = self.env['hospital.lab.result'].search([('request_id.patient_id', 'in', self.ids)])
+        result_lines = {}
+        for line in results.result_line_ids.sorted('sequence').read(['result_id', 'test_name', 'result_value', 'unit']):
+            result_lines.setdefault(line['result_id'][0], []).append({
+                'test_name': line['test_name'],
+                'result_value': line['result_value'],
+                'unit': line['unit'],
+            })
+        for result in results:
+            histories[result.request_id.patient_id.id]['lab_results'].append({
+                'id': result.id,
+                'test_name': result.test_name,
+                'request_date': to_string(result.request_date),
+                'doctor_name': result.doctor_name,
+                'state': result.state,
+                'lines': result_lines.get(result.id, []),
+            })
+
+        # ---- Appointments ----
+        appointments = self.env['hospital.appointment'].search(
+            [('patient_id', 'in', self.ids)], order='appointment_date desc, id desc')
+        for app in appointments.read(['patient_id', 'appointment_date', 'doctor_id', 'state']):
+            histories[app['patient_id'][0]]['appointments'].append({
+                'id': app['id'],
+                'appointment_date': to_string(app['appointment_date']),
+                'doctor': app['doctor_id'] and app['doctor_id'][1],
+                'state': app['state'],
+            })
+
+        # ---- Billing ----
+        billings = self.env['hospital.billing'].search([('patient_id', 'in', self.ids)])
+        for bill in billings.read(['patient_id', 'name', 'date', 'amount_total', 'state']):
+            histories[bill['patient_id'][0]]['billings'].append({
+                'id': bill['id'],
+                'name': bill['name'],
+                'date': to_string(bill['date']),
+                'amount_total': bill['amount_total'],
+                'state': bill['state'],
+            })
+        return histories
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import models, fields, api, _
+from odoo.tools.pdf import merge_pdf
+
+_logger = logging.getLogger(__name__)
+
+
+class HospitalPatientHistoryReport(models.Model):
+    """Background rendering of the patient history PDF.
+
+    The history is split into page-sized chunks, each rendered and committed
+    on its own, then stitched into one ``ir.attachment`` on the patient.
+    The attachment is reused as long as the history stamp does not change.
+    """
+    _name = 'hospital.patient.history.report'
+    _description = 'Patient History PDF'
+    _order = 'id desc'
+
+    patient_id = fields.Many2one('hospital.patient', string="Patient", required=True, ondelete='cascade', index=True)
+    stamp = fields.Char(string="History Stamp", readonly=True)
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Rendering'),
+        ('done', 'Ready'),
+        ('failed', 'Failed'),
+    ], string="Status", default='queued', readonly=True)
+    chunk_count = fields.Integer(string="Chunks", readonly=True)
+    chunks_done = fields.Integer(string="Chunks Rendered", readonly=True)
+    progress = fields.Integer(string="Progress", compute='_compute_progress')
+    attachment_id = fields.Many2one('ir.attachment', string="PDF", readonly=True, ondelete='set null')
+    message = fields.Text(string="Message", readonly=True)
+
+    # items (prescriptions, lab results, appointments) rendered per chunk
+    _CHUNK_SIZE = 100
+    _SECTIONS = ('prescriptions', 'lab_results', 'appointments')
+
+    @api.depends('chunk_count', 'chunks_done', 'state')
+    def _compute_progress(self):
+        for rec in self:
+            if rec.state == 'done':
+                rec.progress = 100
+            else:
+                rec.progress = int(100 * rec.chunks_done / rec.chunk_count) if rec.chunk_count else 0
+
+    # ================== Request ==================
+    @api.model
+    def _request_report(self, patient):
+        """Return an action downloading the up-to-date PDF, or showing the job rendering it."""
+        patient.ensure_one()
+        stamp = patient._get_history_stamps().get(patient.id)
+        # the PDF is rendered with the requester's access rights: one per user
+        job = self.search([('patient_id', '=', patient.id), ('stamp', '=', stamp),
+                           ('create_uid', '=', self.env.uid), ('state', '!=', 'failed')], limit=1)
+        if job.state == 'done' and job.attachment_id:
+            return job.action_download()
+        if not job:
+            # the requester's older jobs, and the finished PDFs of others that no longer
+            # match the history; jobs being rendered or waiting to be are left alone
+            outdated = self.sudo().search([
+                ('patient_id', '=', patient.id), ('state', '!=', 'running'),
+                '|', ('create_uid', '=', self.env.uid),
+                '&', ('stamp', '!=', stamp), ('state', 'in', ('done', 'failed')),
+            ])
+            outdated._unlink_attachments()
+            outdated.unlink()
+            job = self.create({'patient_id': patient.id, 'stamp': stamp})
+            self.env.ref('the_healing_hms.ir_cron_patient_history_report')._trigger()
+        return job.action_open()
+
+    def action_open(self):
+        self.ensure_one()
+        return {
+            'name': _('Patient History PDF'),
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'view_mode': 'form',
+            'res_id': self.id,
+            'target': 'new',
+        }
+
+    def action_download(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{self.attachment_id.id}?download=true',
+            'target': 'self',
+        }
+
+    def action_retry(self):
+        self.write({'state': 'queued', 'message': False})
+        self.env.ref('the_healing_hms.ir_cron_patient_history_report')._trigger()
+
+    # ================== Rendering ==================
+    @api.model
+    def _cron_render_reports(self):
+        for job in self.search([('state', 'in', ('queued', 'running'))], order='id'):
+            job.with_user(job.create_uid)._render(auto_commit=True)
+
+    def _get_chunks(self, history):
+        """Split the history into ``[{section: (start, end)}]`` page-sized chunks."""
+        chunks = []
+        for section in self._SECTIONS:
+            total = len(history.get(section, []))
+            for start in range(0, total, self._CHUNK_SIZE):
+                chunks.append({section: (start, min(start + self._CHUNK_SIZE, total))})
+        return chunks or [{}]
+
+    def _render(self, auto_commit=False):
+        """Render the PDF of the job with the access rights of the current user."""
+        self.ensure_one()
+        if not self.exists():
+            # replaced by a newer request in the meantime
+            return
+        Attachment = self.env['ir.attachment'].sudo()
+        try:
+            patient = self.patient_id
+            stamp = patient._get_history_stamps().get(patient.id)
+            history = patient._get_history()[patient.id]
+            chunks = self._get_chunks(history)
+            if stamp != self.stamp or self.chunk_count != len(chunks):
+                # the data changed since the job was queued: start over
+                self._unlink_attachments()
+                self.write({'stamp': stamp, 'chunks_done': 0})
+            self.write({'state': 'running', 'chunk_count': len(chunks)})
+            if auto_commit:
+                self.env.cr.commit()
+
+            index = self.chunks_done
+            while index < len(chunks):
+                pdf, _report_type = self.env['ir.actions.report']._render_qweb_pdf(
+                    'the_healing_hms.action_report_patient_history_pages',
+                    res_ids=self.patient_id.ids,
+                    data={'job_id': self.id, 'chunk': chunks[index], 'hide_patient': index > 0},
+                )
+                stamp = patient._get_history_stamps().get(patient.id)
+                if stamp != self.stamp:
+                    # the history changed while rendering: the chunks no longer line up
+                    chunks = self._get_chunks(patient._get_history()[patient.id])
+                    self._unlink_attachments()
+                    self.write({'stamp': stamp, 'chunks_done': 0, 'chunk_count': len(chunks)})
+                    index = 0
+                else:
+                    Attachment.create({
+                        'name': 'chunk-%04d.pdf' % index,
+                        'raw': pdf,
+                        'res_model': self._name,
+                        'res_id': self.id,
+                        'mimetype': 'application/pdf',
+                    })
+                    index += 1
+                    self.chunks_done = index
+                if auto_commit:
+                    self.env.cr.commit()
+
+            parts = Attachment.search([
+                ('res_model', '=', self._name), ('res_id', '=', self.id), ('name', '=like', 'chunk-%'),
+            ], order='name')
+            # kept on the job, not the patient: its content depends on the requester's rights
+            attachment = Attachment.create({
+                'name': 'Patient_History_%s.pdf' % (patient.name or patient.id),
+                'raw': merge_pdf([part.raw for part in parts]),
+                'res_model': self._name,
+                'res_id': self.id,
+                'mimetype': 'application/pdf',
+            })
+            parts.unlink()
+            self.write({'attachment_id': attachment.id, 'state': 'done'})
+        except Exception as e:
+            if not auto_commit:
+                raise
+            self.env.cr.rollback()
+            _logger.exception("Patient history PDF %s failed", self.id)
+            if self.exists():
+                self.write({'state': 'failed', 'message': str(e)})
+        if auto_commit:
+            self.env.cr.commit()
+
+    def _unlink_attachments(self):
+        if not self:
+            return
+        self.attachment_id.sudo().unlink()
+        self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name), ('res_id', 'in', self.ids),
+        ]).unlink()
+
+
+class ReportPatientHistoryPages(models.AbstractModel):
+    _name = "report.the_healing_hms.report_patient_history_pages"
+    _description = "Patient History Report (Pages)"
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        data = data or {}
+        docs = self.env['hospital.patient'].browse(docids)
+        history = dict(docs._get_history().get(docs[:1].id) or {})
+        chunk = data.get('chunk')
+        if chunk is not None:
+            for section in HospitalPatientHistoryReport._SECTIONS:
+                start, end = chunk.get(section, (0, 0))
+                history[section] = history.get(section, [])[start:end]
+        return {
+            'doc_ids': docids,
+            'doc_model': 'hospital.patient',
+            'docs': docs,
+            'history': history,
+            'hide_patient': data.get('hide_patient'),
+            'sections': list(chunk) if chunk else None,
+        }
@@ -45,20 +45,41 @@ class PatientHistoryWizard(models.TransientModel):
     # ==== Compute method to fill one2many fields ====
     @api.depends('patient_id')
     def _compute_history(self):
+        histories = self.patient_id._get_history()
         for wiz in self:
-            if wiz.patient_id:
-                wiz.prescription_ids = self.env['hospital.prescription'].search([('patient_id', '=', wiz.patient_id.id)])
-                wiz.billing_ids = self.env['hospital.billing'].search([('patient_id', '=', wiz.patient_id.id)])
-                wiz.appointment_ids = self.env['hospital.appointment'].search([('patient_id', '=', wiz.patient_id.id)])
-
-                wiz.diagnosis = wiz.patient_id.diagnosis
-                wiz.allergies = wiz.patient_id.allergies
-                wiz.lab_result_ids = self.env['hospital.lab.result'].search([('request_id.patient_id', '=', wiz.patient_id.id)])
+            history = histories.get(wiz.patient_id.id)
+            if history:
+                wiz.prescription_ids = self.env['hospital.prescription'].browse(
+                    [presc['id'] for presc in history['prescriptions']])
+                wiz.billing_ids = self.env['hospital.billing'].browse(
+                    [bill['id'] for bill in history['billings']])
+                wiz.appointment_ids = self.env['hospital.appointment'].browse(
+                    [app['id'] for app in history['appointments']])
+                wiz.lab_result_ids = self.env['hospital.lab.result'].browse(
+                    [result['id'] for result in history['lab_results']])
             else:
                 wiz.prescription_ids = [(5, 0, 0)]
                 wiz.billing_ids = [(5, 0, 0)]
                 wiz.appointment_ids = [(5, 0, 0)]
-                wiz.diagnosis = ''
-                wiz.allergies = ''
+                wiz.lab_result_ids = [(5, 0, 0)]
+
     def action_print_history(self):
-        return self.env.ref('the_healing_hms.action_report_patient_history').report_action(self)
\ No newline at end of file
+        # long histories are rendered in the background and cached as an attachment
+        self.ensure_one()
+        return self.env['hospital.patient.history.report']._request_report(self.patient_id)
+
+
+class ReportPatientHistory(models.AbstractModel):
+    _name = "report.the_healing_hms.report_patient_history_view"
+    _description = "Patient History Report"
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        docs = self.env['patient.history.wizard'].browse(docids)
+        histories = docs.patient_id._get_history()
+        return {
+            'doc_ids': docids,
+            'doc_model': 'patient.history.wizard',
+            'docs': docs,
+            'histories': {wiz.id: histories.get(wiz.patient_id.id) for wiz in docs},
+        }
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import itertools
+import json
+import logging
+import time
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+
+class HospitalPatientImport(models.Model):
+    """Streaming CSV / JSON Lines importer for hospital.patient.
+
+    The file is read row by row straight from the filestore and created in
+    chunks through ``model_create_multi``; each chunk is committed with its
+    progress, so an interrupted job resumes from ``row_offset``.
+    """
+    _name = 'hospital.patient.import'
+    _description = 'Patient Bulk Import'
+    _order = 'create_date desc'
+
+    name = fields.Char(string="Import", required=True, default=lambda self: _('New Import'))
+    file = fields.Binary(string="File", attachment=True, required=True)
+    file_name = fields.Char(string="File Name")
+    file_type = fields.Selection([
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ], string="Format", required=True, default='csv')
+    chunk_size = fields.Integer(string="Chunk Size", default=1000, required=True)
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string="Status", default='draft', readonly=True)
+    row_offset = fields.Integer(string="Rows Processed", readonly=True)
+    imported_count = fields.Integer(string="Imported", readonly=True)
+    error_count = fields.Integer(string="Errors", readonly=True)
+    error_ids = fields.One2many('hospital.patient.import.error', 'import_id', string="Row Errors", readonly=True)
+    message = fields.Text(string="Message", readonly=True)
+
+    # ===== Throughput =====
+    duration = fields.Float(string="Duration (s)", readonly=True)
+    rows_per_second = fields.Float(string="Rows / Second", compute='_compute_rows_per_second')
+
+    # columns accepted in the file, mapped 1:1 to hospital.patient fields
+    _IMPORT_FIELDS = [
+        'patient_code', 'first_name', 'last_name', 'phone', 'email', 'nationality',
+        'dob', 'gender', 'blood_type', 'allergies', 'address', 'diagnosis', 'insurance_coverage',
+    ]
+
+    @api.depends('row_offset', 'duration')
+    def _compute_rows_per_second(self):
+        for rec in self:
+            rec.rows_per_second = rec.row_offset / rec.duration if rec.duration else 0.0
+
+    @api.onchange('file_name')
+    def _onchange_file_name(self):
+        if self.file_name and self.file_name.lower().endswith(('.jsonl', '.ndjson')):
+            self.file_type = 'jsonl'
+        elif self.file_name:
+            self.file_type = 'csv'
+
+    # ================== Actions ==================
+    def action_start(self):
+        for rec in self:
+            if rec.chunk_size <= 0:
+                raise UserError(_("The chunk size must be positive."))
+        self.filtered(lambda r: r.state in ('draft', 'failed')).write({'state': 'queued', 'message': False})
+        self.env.ref('the_healing_hms.ir_cron_patient_import')._trigger()
+
+    def action_reset(self):
+        self.error_ids.unlink()
+        self.write({
+            'state': 'draft',
+            'row_offset': 0,
+            'imported_count': 0,
+            'error_count': 0,
+            'duration': 0.0,
+            'message': False,
+        })
+
+    @api.model
+    def _cron_process_imports(self):
+        # "running" jobs were interrupted (worker restart, timeout): resume them
+        for job in self.search([('state', 'in', ('queued', 'running'))], order='id'):
+            job._process(auto_commit=True)
+
+    # ================== Processing ==================
+    def _process(self, auto_commit=False):
+        self.ensure_one()
+        self.state = 'running'
+        if auto_commit:
+            self.env.cr.commit()
+        try:
+            with self._open_source() as stream:
+                rows = self._iter_rows(stream)
+                rows = itertools.islice(rows, self.row_offset, None)
+                # wall time of the whole pipeline: reading, parsing, creating, committing
+                started = time.monotonic()
+                while True:
+                    chunk = list(itertools.islice(rows, self.chunk_size))
+                    if not chunk:
+                        break
+                    created, errors = self.with_context(dashboard_sync_deferred=True)._import_chunk(chunk)
+                    self.env['hospital.patient.import.error'].create(errors)
+                    now = time.monotonic()
+                    self.write({
+                        'row_offset': self.row_offset + len(chunk),
+                        'imported_count': self.imported_count + created,
+                        'error_count': self.error_count + len(errors),
+                        'duration': self.duration + now - started,
+                    })
+                    started = now
+                    if auto_commit:
+                        self.env.cr.commit()
+        except Exception as e:
+            if auto_commit:
+                self.env.cr.rollback()
+            _logger.exception("Patient import %s failed", self.id)
+            self.write({'state': 'failed', 'message': str(e)})
+            if not auto_commit:
+                raise
+        else:
+            self.state = 'done'
+            _logger.info(
+                "Patient import %s: %s rows in %.1fs (%.0f rows/s)",
+                self.id, self.row_offset, self.duration, self.rows_per_second,
+            )
+        if self.imported_count:
+            # one dashboard refresh for the whole file, not one per committed chunk
+            self.env['hospital.patient.dashboard']._schedule_dashboard_refresh()
+        if auto_commit:
+            self.env.cr.commit()
+
+    def _open_source(self):
+        """Open the uploaded file as a text stream without loading it in memory."""
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', '=', 'file'),
+        ], limit=1)
+        if not attachment:
+            raise UserError(_("Please upload a file to import."))
+        if attachment.store_fname:
+            raw = open(attachment._full_path(attachment.store_fname), 'rb')
+        else:
+            raw = io.BytesIO(attachment.raw or b'')
+        return io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+
+    def _iter_rows(self, stream):
+        """Yield ``(row_number, row)`` pairs, ``row`` being a dict or an error message."""
+        if self.file_type == 'jsonl':
+            for row_number, line in enumerate(stream, start=1):
+                if not line.strip():
+                    yield row_number, {}
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield row_number, _("Invalid JSON: %s", e)
+                    continue
+                yield row_number, row if isinstance(row, dict) else _("Each line must be a JSON object.")
+        else:
+            for row_number, row in enumerate(csv.DictReader(stream), start=1):
+                yield row_number, row
+
+    def _convert_row(self, row):
+        Patient = self.env['hospital.patient']
+        vals = {}
+        for fname in self._IMPORT_FIELDS:
+            value = row.get(fname)
+            if isinstance(value, str):
+                value = value.strip()
+            if value in (None, ''):
+                continue
+            field = Patient._fields[fname]
+            if field.type == 'date':
+                value = fields.Date.to_date(value)
+            elif field.type == 'float':
+                value = float(value)
+            elif field.type == 'selection':
+                value = str(value).lower()
+                if value not in dict(field.selection):
+                    raise ValueError(_("Invalid value %(value)r for %(field)s", value=value, field=fname))
+            vals[fname] = value
+        for fname in ('first_name', 'last_name'):
+            if not vals.get(fname):
+                raise ValueError(_("Missing required column %s", fname))
+        return vals
+
+    def _import_chunk(self, chunk):
+        """Create one chunk of patients; returns ``(created_count, error_vals_list)``."""
+        Patient = self.env['hospital.patient']
+        errors = []
+        valid = []
+        for row_number, row in chunk:
+            if isinstance(row, str):
+                errors.append(self._prepare_error(row_number, row, row))
+                continue
+            if not row:
+                continue
+            try:
+                valid.append((row_number, row, self._convert_row(row)))
+            except ValueError as e:
+                errors.append(self._prepare_error(row_number, row, str(e)))
+
+        try:
+            with self.env.cr.savepoint():
+                Patient.create([vals for _row_number, _row, vals in valid])
+            return len(valid), errors
+        except Exception:
+            _logger.info("Patient import %s: chunk rejected, retrying row by row", self.id)
+
+        # isolate the offending rows
+        created = 0
+        for row_number, row, vals in valid:
+            try:
+                with self.env.cr.savepoint():
+                    Patient.create(vals)
+                created += 1
+            except Exception as e:
+                errors.append(self._prepare_error(row_number, row, str(e)))
+        return created, errors
+
+    def _prepare_error(self, row_number, row, message):
+        return {
+            'import_id': self.id,
+            'row_number': row_number,
+            'message': message,
+            'raw': row if isinstance(row, str) else json.dumps(row, default=str),
+        }
+
+
+class HospitalPatientImportError(models.Model):
+    _name = 'hospital.patient.import.error'
+    _description = 'Patient Import Row Error'
+    _order = 'import_id, row_number'
+
+    import_id = fields.Many2one('hospital.patient.import', string="Import", required=True, ondelete='cascade', index=True)
+    row_number = fields.Integer(string="Row")
+    message = fields.Text(string="Error")
+    raw = fields.Text(string="Row Data")
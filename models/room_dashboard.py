@@ -19,80 +19,110 @@ class HospitalRoomDashboard(models.Model):
     confirmed_bookings = fields.Integer(string="Confirmed Bookings", compute='_compute_kpis', store=True)
     cancelled_bookings = fields.Integer(string="Cancelled Bookings", compute='_compute_kpis', store=True)
 
+    _KPI_FIELDS = (
+        'total_rooms', 'available_rooms', 'occupied_rooms',
+        'total_beds', 'available_beds', 'occupied_beds',
+        'total_bookings', 'confirmed_bookings', 'cancelled_bookings',
+    )
+
     @api.depends('department_id')
     def _compute_kpis(self):
+        # a dashboard without department shows the hospital-wide totals
+        hospital_wide = any(not rec.department_id for rec in self)
+        by_department, total = self._get_kpis(None if hospital_wide else self.department_id.ids)
+        empty = dict.fromkeys(self._KPI_FIELDS, 0)
         for rec in self:
-            domain = [('department_id', '=', rec.department_id.id)] if rec.department_id else []
+            rec.update(by_department.get(rec.department_id.id, empty) if rec.department_id else total)
 
-            rooms = self.env['hospital.room'].search(domain)
-            beds = self.env['hospital.bed'].search([('room_id', 'in', rooms.ids)])
-            bookings = self.env['hospital.booking'].search([('room_id', 'in', rooms.ids)])
+    @api.model
+    def _get_kpis(self, department_ids=None):
+        """Return ``({department_id: kpis}, hospital_wide_kpis)`` from one grouped query.
 
-            rec.total_rooms = len(rooms)
-            rec.available_rooms = len(rooms.filtered(lambda r: r.state == 'available'))
-            rec.occupied_rooms = len(rooms.filtered(lambda r: r.state == 'occupied'))
+        ``department_ids=None`` aggregates every department.
+        """
+        for model in ('hospital.room', 'hospital.bed', 'hospital.booking'):
+            self.env[model].flush_model()
+        Booking = self.env['hospital.booking']
+        dep_filter = "AND r.department_id IN %(departments)s" if department_ids is not None else ""
+        self.env.cr.execute(f"""
+            SELECT 'room', r.department_id, r.state, count(*)
+              FROM hospital_room r
+             WHERE TRUE {dep_filter}
+          GROUP BY r.department_id, r.state
+         UNION ALL
+            SELECT 'bed', r.department_id,
+                   CASE WHEN EXISTS (SELECT 1 FROM hospital_booking k
+                                      WHERE k.bed_id = b.id
+                                        AND k.state IN %(active)s
+                                        AND tsrange(k.date_from, k.date_to) @> %(now)s::timestamp)
+                        THEN 'occupied' ELSE 'available' END AS bed_state,
+                   count(*)
+              FROM hospital_bed b
+              JOIN hospital_room r ON r.id = b.room_id
+             WHERE TRUE {dep_filter}
+          GROUP BY r.department_id, bed_state
+         UNION ALL
+            SELECT 'booking', r.department_id, k.state, count(*)
+              FROM hospital_booking k
+              JOIN hospital_room r ON r.id = k.room_id
+             WHERE TRUE {dep_filter}
+          GROUP BY r.department_id, k.state
+        """, {
+            'departments': tuple(department_ids or ()) or (None,),
+            'active': Booking._ACTIVE_STATES,
+            'now': fields.Datetime.now(),
+        })
+
+        by_department = {}
+        total = dict.fromkeys(self._KPI_FIELDS, 0)
+        for kind, department_id, state, count in self.env.cr.fetchall():
+            kpis = by_department.setdefault(department_id, dict.fromkeys(self._KPI_FIELDS, 0))
+            for values in (kpis, total):
+                if kind == 'room':
+                    values['total_rooms'] += count
+                    if state in ('available', 'occupied'):
+                        values[f'{state}_rooms'] += count
+                elif kind == 'bed':
+                    values['total_beds'] += count
+                    values[f'{state}_beds'] += count
+                else:
+                    values['total_bookings'] += count
+                    if state in ('confirmed', 'cancelled'):
+                        values[f'{state}_bookings'] += count
+        return by_department, total
 
-            rec.total_beds = len(beds)
-            rec.occupied_beds = len(beds.filtered(lambda b: b.is_occupied))
-            rec.available_beds = rec.total_beds - rec.occupied_beds
+    # ================== Auto-update dashboard ==================
+    _REFRESH_PRECOMMIT_KEY = 'hospital.room.dashboard.departments'
 
-            rec.total_bookings = len(bookings)
-            rec.confirmed_bookings = len(bookings.filtered(lambda b: b.state == 'confirmed'))
-            rec.cancelled_bookings = len(bookings.filtered(lambda b: b.state == 'cancelled'))
+    @api.model
+    def _schedule_refresh(self, departments):
+        """Queue the dashboards of ``departments``; each is recomputed once, right before commit."""
+        if not departments:
+            return
+        data = self.env.cr.precommit.data
+        pending = data.get(self._REFRESH_PRECOMMIT_KEY)
+        if pending is None:
+            pending = data[self._REFRESH_PRECOMMIT_KEY] = set()
+
+            @self.env.cr.precommit.add
+            def _refresh_room_dashboards():
+                self._refresh_departments(data.pop(self._REFRESH_PRECOMMIT_KEY, set()))
+        pending.update(departments.ids)
+
+    @api.model
+    def _refresh_departments(self, department_ids):
+        departments = self.env['hospital.department'].browse(department_ids).exists()
+        if not departments:
+            return
+        dashboards = self.search([('department_id', 'in', departments.ids)])
+        self.create([{'department_id': dep.id} for dep in departments - dashboards.department_id])
+        dashboards._compute_kpis()
+        self.env.flush_all()
 
-    # ================== Auto-update dashboard ==================
     @api.model
     def update_room_dashboard(self, department=None):
         """
-        Update or create dashboard record for a given department.
+        Update or create dashboard record for a given department (all departments by default).
+        The refresh is deferred to the end of the transaction.
         """
-        departments = [department] if department else self.env['hospital.department'].search([])
-        for dep in departments:
-            dash = self.search([('department_id', '=', dep.id)])
-            if not dash:
-                dash = self.create({'department_id': dep.id})
-            else:
-                dash._compute_kpis()
-
-# ================== Hooks for room and booking models ==================
-class HospitalRoom(models.Model):
-    _inherit = 'hospital.room'
-
-    def create(self, vals):
-        res = super().create(vals)
-        self.env['hospital.room.dashboard'].update_room_dashboard(res.department_id)
-        return res
-
-    def write(self, vals):
-        res = super().write(vals)
-        for rec in self:
-            self.env['hospital.room.dashboard'].update_room_dashboard(rec.department_id)
-        return res
-
-    def unlink(self):
-        for rec in self:
-            self.env['hospital.room.dashboard'].update_room_dashboard(rec.department_id)
-        return super().unlink()
-
-
-class HospitalBooking(models.Model):
-    _inherit = 'hospital.booking'
-
-    def create(self, vals):
-        res = super().create(vals)
-        if res.room_id:
-            self.env['hospital.room.dashboard'].update_room_dashboard(res.room_id.department_id)
-        return res
-
-    def write(self, vals):
-        res = super().write(vals)
-        for rec in self:
-            if rec.room_id:
-                self.env['hospital.room.dashboard'].update_room_dashboard(rec.room_id.department_id)
-        return res
-
-    def unlink(self):
-        for rec in self:
-            if rec.room_id:
-                self.env['hospital.room.dashboard'].update_room_dashboard(rec.room_id.department_id)
-        return super().unlink()
+        self._schedule_refresh(department or self.env['hospital.department'].search([]))
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import models, fields, api, tools
+from odoo.tools.cache import get_cache_key_counter
+
+
+class HospitalRoomTariff(models.Model):
+    """Daily price of a room type, optionally per department, with effective dates."""
+    _name = 'hospital.room.tariff'
+    _description = 'Room Tariff'
+    _order = 'room_type, department_id, date_from desc'
+
+    room_type = fields.Selection([
+        ('single', 'Single (1 Bed)'),
+        ('double', 'Double (2 Beds)'),
+        ('ward', 'Ward (7 Beds)'),
+    ], string="Room Type", required=True)
+    department_id = fields.Many2one('hospital.department', string="Department",
+                                    help="Leave empty for the hospital-wide price of the room type.")
+    date_from = fields.Date(string="Effective From", required=True, default=fields.Date.context_today)
+    date_to = fields.Date(string="Effective To")
+    price_per_day = fields.Float(string="Price per Day", required=True)
+    active = fields.Boolean(string="Active", default=True)
+
+    _sql_constraints = [
+        ('date_check', 'CHECK(date_to IS NULL OR date_to >= date_from)', 'The tariff must end after it starts.'),
+        ('price_check', 'CHECK(price_per_day >= 0)', 'The price per day cannot be negative.'),
+    ]
+
+    # used when no tariff matches (the former hard-coded rate)
+    DEFAULT_RATE = 15.0
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._drop_tariff_table()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._drop_tariff_table()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._drop_tariff_table()
+        return res
+
+    # ================== Pricing ==================
+    @api.model
+    def _get_tariff_version(self):
+        """Change stamp of the tariffs, part of the cache key of the table: the
+        other workers load the new table once the change is committed."""
+        self.flush_model()
+        self.env.cr.execute("SELECT count(*), max(write_date) FROM hospital_room_tariff")
+        return self.env.cr.fetchone()
+
+    @api.model
+    def _drop_tariff_table(self):
+        # a second change in the same transaction keeps the version (same write_date)
+        cache, key, _counter = get_cache_key_counter(self._get_tariff_table, self._get_tariff_version())
+        cache.pop(key, None)
+
+    @tools.ormcache('version')
+    def _get_tariff_table(self, version):
+        """Return ``{(department_id, room_type): ((date_from, date_to, price), ...)}``,
+        the newest tariff first; loaded once per ``version`` of the tariffs."""
+        table = {}
+        for tariff in self.sudo().search([], order='date_from desc, id desc'):
+            key = (tariff.department_id.id, tariff.room_type)
+            table.setdefault(key, []).append((tariff.date_from, tariff.date_to, tariff.price_per_day))
+        return {key: tuple(rows) for key, rows in table.items()}
+
+    @api.model
+    def _get_rate(self, table, department_id, room_type, day):
+        # the department tariff wins over the hospital-wide one
+        for key in ((department_id, room_type), (False, room_type)):
+            for date_from, date_to, price in table.get(key, ()):
+                if date_from <= day and (not date_to or day <= date_to):
+                    return price
+        return self.DEFAULT_RATE
+
+    @api.model
+    def _price_stays(self, stays):
+        """Price a batch of stays in one pass.
+
+        :param stays: iterable of ``(department_id, room_type, date_from, date_to)``
+        :return: list of ``(days, price)``; every started day is charged at the
+                 tariff in effect on that day
+        """
+        table = self._get_tariff_table(self._get_tariff_version())
+        result = []
+        for department_id, room_type, date_from, date_to in stays:
+            if not (room_type and date_from and date_to) or date_to <= date_from:
+                result.append((0, 0.0))
+                continue
+            delta = date_to - date_from
+            days = delta.days + (1 if delta.seconds > 0 else 0)
+            first = date_from.date()
+            price = sum(
+                self._get_rate(table, department_id, room_type, first + timedelta(days=i))
+                for i in range(days)
+            )
+            result.append((days, price))
+        return result
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api, _
+from collections import defaultdict
+
+from odoo import models, fields, api, tools, Command, _
 from odoo.exceptions import ValidationError
+from odoo.tools import frozendict
 
 
 class HospitalStaff(models.Model):
@@ -40,7 +43,14 @@ class HospitalStaff(models.Model):
     experience_years = fields.Integer(string="Experience (Years)", default=0)
     working_hours = fields.Float(string="Working Hours", default=0.0)
     management = fields.Integer(string="Management", default=0)
-    is_available = fields.Boolean(string="Available", default=True)
+    is_available = fields.Boolean(
+        string="Available", default=True,
+        help="Uncheck to take the staff member off duty whatever the roster says.",
+    )
+    on_duty = fields.Boolean(
+        string="On Duty Now", compute='_compute_on_duty', search='_search_on_duty',
+    )
+    roster_ids = fields.One2many('hospital.staff.roster', 'staff_id', string="Roster")
     ambulance_id = fields.Many2one('healing_hms.ambulance', string="Ambulance")
     status = fields.Selection([
         ('available', 'Available'),
@@ -57,10 +67,28 @@ class HospitalStaff(models.Model):
         compute_sudo=True
     )
 
-    @api.depends('patient_ids')
+    @api.depends('patient_ids', 'job_title')
     def _compute_patient_count(self):
+        # one grouped count for all the displayed doctors
+        doctors = self.filtered(lambda rec: rec.job_title == 'doctor')
+        counts = dict(self.env['hospital.patient']._read_group(
+            [('doctor_id', 'in', doctors.ids)], ['doctor_id'], ['__count'],
+        ))
+        for rec in self:
+            rec.patient_count = counts.get(rec, 0) if rec.job_title == 'doctor' else 0
+
+    # ===== التوفر حسب جدول المناوبات =====
+    def _compute_on_duty(self):
+        available = self.env['hospital.staff.roster']._get_available_staff(fields.Datetime.now(), job_title=False)
         for rec in self:
-            rec.patient_count = len(rec.patient_ids) if rec.job_title == 'doctor' else 0
+            rec.on_duty = rec in available
+
+    def _search_on_duty(self, operator, value):
+        if operator not in ('=', '!='):
+            return NotImplemented
+        available = self.env['hospital.staff.roster']._get_available_staff(fields.Datetime.now(), job_title=False)
+        positive = (operator == '=') == bool(value)
+        return [('id', 'in' if positive else 'not in', available.ids)]
 
     # ===== Staff ID =====
     staff_id = fields.Char(
@@ -71,104 +99,137 @@ class HospitalStaff(models.Model):
         default='NEW'
     )
 
-    # ===== توليد Staff ID عند الإنشاء + إنشاء يوزر تلقائي =====
+    # ===== خرائط الوظائف: تسلسل الـ Staff ID + جروب اليوزر =====
+    _STAFF_SEQUENCE_CODES = {
+        'manager': 'hospital.staff.manager',
+        'doctor': 'hospital.staff.doctor',
+        'nurse': 'hospital.staff.nurse',
+        'receptionist': 'hospital.staff.receptionist',
+        'accountant': 'hospital.staff.accountant',
+        'pharmacist': 'hospital.staff.pharmacist',
+        'ambulance': 'hospital.staff.driver',
+        'lab': 'hospital.staff.lab',
+    }
+    _STAFF_GROUPS = {
+        'manager': 'the_healing_hms.group_hospital_manager',
+        'doctor': 'the_healing_hms.group_hospital_doctor',
+        'nurse': 'the_healing_hms.group_hospital_nurse',
+        'receptionist': 'the_healing_hms.group_hospital_receptionist',
+        'accountant': 'the_healing_hms.group_hospital_accountant',
+        'pharmacist': 'the_healing_hms.group_hospital_pharmacist',
+        'ambulance': 'the_healing_hms.group_hospital_driver',
+        'lab': 'the_healing_hms.group_hospital_lab',
+    }
+
+    @tools.ormcache()
+    def _get_staff_group_ids(self):
+        """Return ``{job_title: group_id}``, resolved once per registry."""
+        group_ids = {}
+        for job_title, xml_id in self._STAFF_GROUPS.items():
+            group = self.env.ref(xml_id, raise_if_not_found=False)
+            if group:
+                group_ids[job_title] = group.id
+        return frozendict(group_ids)
+
+    # ===== توليد Staff ID عند الإنشاء + إنشاء يوزر تلقائي (دفعة واحدة) =====
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if not vals.get('email'):
+                raise ValidationError(_("Email is required for staff and must be unique."))
+        self._assign_staff_ids(vals_list)
+        self._create_users_for_vals(vals_list)
+        return super().create(vals_list)
+
+    @api.model
+    def _assign_staff_ids(self, vals_list):
+        """Fill ``staff_id`` in place, reserving one block of numbers per job title."""
+        by_job = defaultdict(list)
+        for vals in vals_list:
+            if vals.get('job_title') in self._STAFF_SEQUENCE_CODES:
+                by_job[vals['job_title']].append(vals)
+        Sequence = self.env['ir.sequence'].sudo()
+        for job_title, job_vals in by_job.items():
+            numbers = Sequence._reserve_numbers_by_code(self._STAFF_SEQUENCE_CODES[job_title], len(job_vals))
+            for vals, number in zip(job_vals, numbers):
+                vals['staff_id'] = number
+        return vals_list
+
     @api.model
-    def create(self, vals):
-        if not vals.get('email'):
-            raise ValidationError(_("Email is required for staff and must be unique."))
-        vals = self._update_staff_id(vals)
-        staff = super().create(vals)
-        staff._create_user_from_staff()
-        return staff
+    def _create_users_for_vals(self, vals_list):
+        """Create the missing related users in one batch and set ``user_id`` in place."""
+        group_ids = self._get_staff_group_ids()
+        todo = [vals for vals in vals_list if not vals.get('user_id')]
+        if not todo:
+            return
+        users = self.env['res.users'].sudo().create([{
+            'name': vals.get('name'),
+            'login': vals['email'],  # login = Email
+            'email': vals['email'],
+            'phone': vals.get('phone'),
+            'groups_id': [Command.set([group_ids[vals['job_title']]] if vals.get('job_title') in group_ids else [])],
+            'password': '1234',  # كلمة سر افتراضية
+        } for vals in todo])
+        for vals, user in zip(todo, users):
+            vals['user_id'] = user.id
 
     # ===== تعديل job_title يحدث Staff ID + الجروب =====
     def write(self, vals):
-        if 'job_title' in vals:
-            for rec in self:
-                updated_vals = rec._update_staff_id(vals.copy())
-                super(HospitalStaff, rec).write(updated_vals)
-            return True
-        return super().write(vals)
+        if 'job_title' not in vals or not self:
+            return super().write(vals)
+        res = super().write(vals)
+        self._assign_staff_ids_bulk(vals['job_title'])
+        self._sync_user_groups()
+        return res
+
+    def _assign_staff_ids_bulk(self, job_title):
+        """Give ``self`` new staff IDs from the ``job_title`` sequence in one UPDATE."""
+        seq_code = self._STAFF_SEQUENCE_CODES.get(job_title)
+        if not seq_code:
+            return
+        numbers = self.env['ir.sequence'].sudo()._reserve_numbers_by_code(seq_code, len(self))
+        if not numbers:
+            return
+        self.env.cr.execute("""
+            UPDATE hospital_staff s
+               SET staff_id = v.staff_id
+              FROM (SELECT unnest(%s::int[]) AS id, unnest(%s::varchar[]) AS staff_id) v
+             WHERE s.id = v.id
+        """, [self.ids, numbers])
+        self.invalidate_recordset(['staff_id'])
 
     # ===== توليد Staff ID =====
     def _update_staff_id(self, vals):
         if not isinstance(vals, dict):
             vals = {}
 
-        job_title = vals.get('job_title')
-        if not job_title:
-            return vals
-
-        code_map = {
-            'manager': 'hospital.staff.manager',
-            'doctor': 'hospital.staff.doctor',
-            'nurse': 'hospital.staff.nurse',
-            'receptionist': 'hospital.staff.receptionist',
-            'accountant': 'hospital.staff.accountant',
-            'pharmacist': 'hospital.staff.pharmacist',
-            'ambulance': 'hospital.staff.driver',
-            'lab': 'hospital.staff.lab',
-        }
-
-        seq_code = code_map.get(job_title)
+        seq_code = self._STAFF_SEQUENCE_CODES.get(vals.get('job_title'))
         if seq_code:
-            seq_obj = self.env['ir.sequence'].sudo().search([('code', '=', seq_code)], limit=1)
-            if seq_obj:
-                vals['staff_id'] = seq_obj.next_by_id() or 'NEW'
+            numbers = self.env['ir.sequence'].sudo()._reserve_numbers_by_code(seq_code, 1)
+            if numbers:
+                vals['staff_id'] = numbers[0]
         return vals
 
     # ===== إنشاء يوزر تلقائي للموظف =====
     def _create_user_from_staff(self):
         self.ensure_one()
         if not self.user_id:
-            group_map = {
-                'manager': 'the_healing_hms.group_hospital_manager',
-                'doctor': 'the_healing_hms.group_hospital_doctor',
-                'nurse': 'the_healing_hms.group_hospital_nurse',
-                'receptionist': 'the_healing_hms.group_hospital_receptionist',
-                'accountant': 'the_healing_hms.group_hospital_accountant',
-                'pharmacist': 'the_healing_hms.group_hospital_pharmacist',
-                'ambulance': 'the_healing_hms.group_hospital_driver',
-                'lab': 'the_healing_hms.group_hospital_lab',
-            }
-            group_xml_id = group_map.get(self.job_title)
-            groups = []
-            if group_xml_id:
-                try:
-                    groups = [self.env.ref(group_xml_id).id]
-                except ValueError:
-                    pass
-
-            user_vals = {
-                'name': self.name,
-                'login': self.email,  # login = Email
-                'email': self.email,
-                'phone': self.phone,
-                'groups_id': [(6, 0, groups)],
-                'password': '1234',  # كلمة سر افتراضية
-            }
-            user = self.env['res.users'].sudo().create(user_vals)
-            self.user_id = user.id
+            vals = {'name': self.name, 'email': self.email, 'phone': self.phone, 'job_title': self.job_title}
+            self._create_users_for_vals([vals])
+            self.user_id = vals['user_id']
 
     # ===== تحديث جروبات اليوزر إذا تغيرت الوظيفة =====
     def _update_user_groups(self):
         self.ensure_one()
-        if self.user_id:
-            group_map = {
-                'manager': 'the_healing_hms.group_hospital_manager',
-                'doctor': 'the_healing_hms.group_hospital_doctor',
-                'nurse': 'the_healing_hms.group_hospital_nurse',
-                'receptionist': 'the_healing_hms.group_hospital_receptionist',
-                'accountant': 'the_healing_hms.group_hospital_accountant',
-                'pharmacist': 'the_healing_hms.group_hospital_pharmacist',
-                'ambulance': 'the_healing_hms.group_hospital_driver',
-                'lab': 'the_healing_hms.group_hospital_lab',
-            }
-            group_xml_id = group_map.get(self.job_title)
-            groups = []
-            if group_xml_id:
-                try:
-                    groups = [self.env.ref(group_xml_id).id]
-                except ValueError:
-                    pass
-            self.user_id.sudo().write({'groups_id': [(6, 0, groups)]})
+        self._sync_user_groups()
+
+    def _sync_user_groups(self):
+        """Swap the hospital group of the related users, one write per job title."""
+        group_ids = self._get_staff_group_ids()
+        # only the hospital role groups are replaced, other memberships are kept
+        unlink_all = [Command.unlink(group_id) for group_id in group_ids.values()]
+        for job_title, staff in self.filtered('user_id').grouped('job_title').items():
+            commands = list(unlink_all)
+            if job_title in group_ids:
+                commands.append(Command.link(group_ids[job_title]))
+            staff.user_id.sudo().write({'groups_id': commands})
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, tools, _
+
+
+class HospitalStaffRoster(models.Model):
+    """Shift, on-call and leave periods of the staff.
+
+    Availability is answered from this table through a GiST index on the
+    ``[date_start, date_end)`` range; the manual ``is_available`` flag of the
+    staff still takes a member off duty.
+    """
+    _name = 'hospital.staff.roster'
+    _description = 'Staff Roster'
+    _order = 'date_start desc, id desc'
+
+    staff_id = fields.Many2one('hospital.staff', string="Staff", required=True, ondelete='cascade', index=True)
+    kind = fields.Selection([
+        ('shift', 'Shift'),
+        ('on_call', 'On Call'),
+        ('leave', 'Leave'),
+    ], string="Type", required=True, default='shift')
+    date_start = fields.Datetime(string="From", required=True)
+    date_end = fields.Datetime(string="To", required=True)
+    department_id = fields.Many2one(related='staff_id.department_id', store=True, index=True)
+    specialization_id = fields.Many2one(related='staff_id.specialization_id', store=True)
+    note = fields.Char(string="Note")
+
+    _sql_constraints = [
+        ('date_check', 'CHECK(date_end > date_start)', 'The end of a roster period must be after its start.'),
+    ]
+
+    # kinds during which the staff member can be booked
+    _WORKING_KINDS = ('shift', 'on_call')
+
+    def init(self):
+        tools.create_index(
+            self.env.cr, 'hospital_staff_roster_period_idx', self._table,
+            ['tsrange(date_start, date_end)'], method='gist',
+        )
+
+    # ===== keep the doctors' free-slot maps in sync =====
+    def _get_slot_keys(self):
+        SlotMap = self.env['hospital.appointment.slot.map']
+        return {
+            (rec.staff_id.id, day)
+            for rec in self
+            if rec.staff_id.job_title == 'doctor'
+            for day in SlotMap._days_between(rec.date_start, rec.date_end)
+        }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['hospital.appointment.slot.map']._mark_dirty(records._get_slot_keys())
+        return records
+
+    def write(self, vals):
+        keys = self._get_slot_keys()
+        res = super().write(vals)
+        self.env['hospital.appointment.slot.map']._mark_dirty(keys | self._get_slot_keys())
+        return res
+
+    def unlink(self):
+        self.env['hospital.appointment.slot.map']._mark_dirty(self._get_slot_keys())
+        return super().unlink()
+
+    @api.depends('staff_id', 'kind', 'date_start')
+    def _compute_display_name(self):
+        kinds = dict(self._fields['kind'].selection)
+        for rec in self:
+            rec.display_name = f"{rec.staff_id.name or ''} - {kinds.get(rec.kind, '')}"
+
+    # ================== Availability API ==================
+    @api.model
+    def _get_available_staff(self, date_from, date_to=None, department=None, specialization=None, job_title='doctor'):
+        """Return the ``hospital.staff`` working during the whole ``[date_from, date_to)``
+        window (one shift or on-call period covering it) and not on leave during it.
+        Without ``date_to``, the staff working at the instant ``date_from``.
+
+        ``department`` and ``specialization`` may be records or ids; ``job_title``
+        may be ``False`` to search every kind of staff.
+        """
+        # roster periods are half-open: a window ending at the end of a shift fits in it
+        bounds = '[)' if date_to and date_to > date_from else '[]'
+        date_to = date_to or date_from
+        self.flush_model()
+        self.env['hospital.staff'].flush_model(
+            ['active', 'is_available', 'job_title', 'department_id', 'specialization_id'])
+        where = ["s.active", "s.is_available"]
+        params = {
+            'from': date_from,
+            'to': date_to,
+            'bounds': bounds,
+            'working': self._WORKING_KINDS,
+        }
+        if job_title:
+            where.append("s.job_title = %(job_title)s")
+            params['job_title'] = job_title
+        if department:
+            where.append("s.department_id = %(department)s")
+            params['department'] = getattr(department, 'id', department)
+        if specialization:
+            where.append("s.specialization_id = %(specialization)s")
+            params['specialization'] = getattr(specialization, 'id', specialization)
+        self.env.cr.execute(f"""
+            SELECT s.id
+              FROM hospital_staff s
+             WHERE {' AND '.join(where)}
+               AND EXISTS (SELECT 1 FROM hospital_staff_roster r
+                            WHERE r.staff_id = s.id
+                              AND r.kind IN %(working)s
+                              AND tsrange(r.date_start, r.date_end) @> tsrange(%(from)s, %(to)s, %(bounds)s))
+               AND NOT EXISTS (SELECT 1 FROM hospital_staff_roster r
+                                WHERE r.staff_id = s.id
+                                  AND r.kind = 'leave'
+                                  AND tsrange(r.date_start, r.date_end) && tsrange(%(from)s, %(to)s, %(bounds)s))
+          ORDER BY s.name
+        """, params)
+        return self.env['hospital.staff'].browse(row[0] for row in self.env.cr.fetchall())
+
+    @api.model
+    def _is_staff_available(self, staff, date_from, date_to=None):
+        staff.ensure_one()
+        available = self._get_available_staff(
+            date_from, date_to, department=staff.department_id, job_title=staff.job_title,
+        )
+        return staff in available
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+from . import test_patient_import
+from . import test_patient_search
+from . import test_patient_merge
+from . import test_staff_roster
+from . import test_appointment_slot
+from . import test_room_booking
+from . import test_room_counters
+from . import test_room_tariff
+from . import test_appointment_counts
+from . import test_bed_census
+from . import test_room_dashboard
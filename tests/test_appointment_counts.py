@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAppointmentCounts(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.department = cls.env['hospital.department'].create({'name': 'Dermatology'})
+        cls.doctor = cls.env['hospital.staff'].create({
+            'name': 'Dr. Skin', 'job_title': 'doctor', 'email': 'dr.skin@example.com',
+            'department_id': cls.department.id,
+        })
+        Patient = cls.env['hospital.patient']
+        cls.patient_a = Patient.create({'first_name': 'Hala', 'last_name': 'Odeh'})
+        cls.patient_b = Patient.create({'first_name': 'Sami', 'last_name': 'Odeh'})
+
+    def test_bulk_create_counts_once_and_defers_dashboard(self):
+        cron = self.env.ref('the_healing_hms.ir_cron_refresh_patient_dashboard')
+        Trigger = self.env['ir.cron.trigger']
+        triggers = Trigger.search_count([('cron_id', '=', cron.id)])
+        start = datetime(2026, 9, 1, 9)
+        patients = [self.patient_a] * 3 + [self.patient_b]
+        with patch.object(type(self.env['hospital.patient.dashboard']), 'refresh_dashboard', autospec=True) as refresh:
+            self.env['hospital.appointment'].create([{
+                'patient_id': patient.id,
+                'department_id': self.department.id,
+                'doctor_id': self.doctor.id,
+                'appointment_date': start + timedelta(hours=index),
+            } for index, patient in enumerate(patients)])
+            self.env.cr.precommit.run()
+        refresh.assert_not_called()
+        self.assertEqual((self.patient_a.total_count, self.patient_b.total_count), (3, 1))
+        self.assertEqual(Trigger.search_count([('cron_id', '=', cron.id)]), triggers + 1,
+                         "the refresh is left to the cron, triggered once per transaction")
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAppointmentSlots(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.doctor = cls.env['hospital.staff'].create({
+            'name': 'Dr. Night', 'job_title': 'doctor', 'email': 'dr.night@example.com',
+        })
+        cls.env['hospital.staff.roster'].create({
+            'staff_id': cls.doctor.id, 'kind': 'shift',
+            'date_start': datetime(2026, 6, 1, 22), 'date_end': datetime(2026, 6, 2, 2),
+        })
+
+    def _find(self, date_from, date_to, duration):
+        slots = self.env['hospital.appointment'].find_available_slots(date_from, date_to, duration=duration, limit=50)
+        return [slot['start'] for slot in slots if slot['doctor_id'] == self.doctor.id]
+
+    def test_slot_across_midnight(self):
+        starts = self._find(datetime(2026, 6, 1, 23), datetime(2026, 6, 2, 1), 1.0)
+        self.assertEqual(starts[0], datetime(2026, 6, 1, 23))
+        self.assertIn(datetime(2026, 6, 1, 23, 30), starts)
+        self.assertEqual(starts[-1], datetime(2026, 6, 2, 0), "the slot must end inside the window")
+
+    def test_lookup_does_not_write(self):
+        self._find(datetime(2026, 6, 1, 20), datetime(2026, 6, 2, 3), 0.5)
+        self.assertFalse(self.env['hospital.appointment.slot.map'].search_count([('doctor_id', '=', self.doctor.id)]))
+
+    def test_doctor_marked_unavailable(self):
+        self.doctor.is_available = False
+        self.assertFalse(self._find(datetime(2026, 6, 1, 23), datetime(2026, 6, 2, 1), 0.5))
+
+    def test_outside_roster(self):
+        self.assertFalse(self._find(datetime(2026, 6, 1, 10), datetime(2026, 6, 1, 18), 0.5))
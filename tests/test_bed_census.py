@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestBedCensus(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.department = cls.env['hospital.department'].create({'name': 'Neurology'})
+        Room, Bed = cls.env['hospital.room'], cls.env['hospital.bed']
+        for number, room_type, beds in (('N-1', 'single', 1), ('N-2', 'double', 2)):
+            room = Room.create({'room_number': number, 'department_id': cls.department.id, 'room_type': room_type})
+            Bed.create([{'name': '%s-%s' % (number, index), 'room_id': room.id} for index in range(beds)])
+        patient = cls.env['hospital.patient'].create({'first_name': 'Rami', 'last_name': 'Aziz'})
+        bed = Bed.search([('room_id.room_number', '=', 'N-2')], limit=1)
+        cls.env['hospital.booking'].create({
+            'patient_id': patient.id, 'department_id': cls.department.id, 'room_id': bed.room_id.id,
+            'bed_id': bed.id, 'date_from': datetime(2026, 4, 1), 'date_to': datetime(2026, 4, 3),
+            'state': 'confirmed',
+        })
+
+    def test_snapshot_totals(self):
+        Census = self.env['hospital.bed.census']
+        Census._take_snapshot(datetime(2026, 4, 2, 10, 25))
+        domain = [('department_id', '=', self.department.id)]
+        rows = Census.search(domain)
+        self.assertEqual(len(rows), 2, "one row per room type")
+        self.assertEqual(set(rows.mapped('snapshot_at')), {datetime(2026, 4, 2, 10)})
+        [totals] = Census._read_group(domain, [], ['total_beds:sum', 'occupied_beds:sum', 'available_beds:sum'])
+        self.assertEqual(totals, (3, 1, 2))
+
+        # re-running the hour replaces it
+        Census._take_snapshot(datetime(2026, 4, 2, 10, 50))
+        self.assertEqual(Census.search_count(domain), 2)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import base64
+import logging
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+class PatientImportCase(TransactionCase):
+
+    def _make_import(self, lines, chunk_size=1000, file_type='csv'):
+        return self.env['hospital.patient.import'].create({
+            'name': 'Test Import',
+            'file': base64.b64encode('\n'.join(lines).encode()),
+            'file_name': 'patients.%s' % file_type,
+            'file_type': file_type,
+            'chunk_size': chunk_size,
+        })
+
+    @staticmethod
+    def _csv_lines(count, start=0):
+        lines = ['first_name,last_name,phone,gender,dob']
+        lines += [
+            'First%d,Last%d,+9627%08d,%s,1980-01-%02d' % (i, i, i, ('male', 'female')[i % 2], i % 28 + 1)
+            for i in range(start, start + count)
+        ]
+        return lines
+
+
+@tagged('post_install', '-at_install')
+class TestPatientImport(PatientImportCase):
+
+    def test_import_csv_with_row_errors(self):
+        lines = self._csv_lines(5) + ['NoLastName,,,,', 'Bad,Gender,,robot,']
+        job = self._make_import(lines, chunk_size=2)
+        job._process()
+
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(job.row_offset, 7)
+        self.assertEqual(job.imported_count, 5)
+        self.assertEqual(job.error_count, 2)
+        self.assertEqual(sorted(job.error_ids.mapped('row_number')), [6, 7])
+        patients = self.env['hospital.patient'].search([('first_name', 'like', 'First')])
+        self.assertEqual(len(patients), 5)
+        self.assertEqual(len(set(patients.mapped('patient_code'))), 5, "codes are reserved without duplicates")
+
+    def test_import_jsonl(self):
+        lines = ['{"first_name": "Json", "last_name": "One"}', '', 'not json', '[1, 2]']
+        job = self._make_import(lines, file_type='jsonl')
+        job._process()
+
+        self.assertEqual(job.imported_count, 1)
+        self.assertEqual(job.error_count, 2)
+
+    def test_resume_from_offset(self):
+        job = self._make_import(self._csv_lines(6), chunk_size=2)
+        job.write({'state': 'running', 'row_offset': 4, 'imported_count': 4})
+        job._process()
+
+        self.assertEqual(job.row_offset, 6)
+        self.assertEqual(job.imported_count, 6)
+        self.assertEqual(self.env['hospital.patient'].search_count([('first_name', 'like', 'First')]), 2)
+
+    def test_dashboard_refreshed_once_per_job(self):
+        job = self._make_import(self._csv_lines(6), chunk_size=2)
+        Dashboard = type(self.env['hospital.patient.dashboard'])
+        with patch.object(Dashboard, 'refresh_dashboard', autospec=True) as refresh:
+            # an immediate refresh makes every scheduled one visible
+            job.with_context(dashboard_sync_immediate=True)._process()
+        self.assertEqual(job.imported_count, 6)
+        self.assertEqual(refresh.call_count, 1, "the chunks leave the dashboard to the end of the job")
+
+
+@tagged('-standard', 'patient_import_benchmark')
+class BenchmarkPatientImport(PatientImportCase):
+    """Throughput of the import pipeline, end to end.
+
+    Not part of the regular run; start it with
+    ``--test-tags /the_healing_hms:BenchmarkPatientImport``.
+    """
+    ROWS = 20000
+    CHUNK_SIZE = 1000
+
+    def test_benchmark_csv_import(self):
+        job = self._make_import(self._csv_lines(self.ROWS), chunk_size=self.CHUNK_SIZE)
+        job._process()
+
+        self.assertEqual(job.imported_count, self.ROWS)
+        _logger.info(
+            "Patient import benchmark: %s rows in %.2fs (%.0f rows/s, chunk size %s)",
+            job.row_offset, job.duration, job.rows_per_second, self.CHUNK_SIZE,
+        )
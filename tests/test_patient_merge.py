@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from odoo.exceptions import AccessError
+from odoo.tests import TransactionCase, tagged
+from odoo.tests.common import new_test_user
+
+
+@tagged('post_install', '-at_install')
+class TestPatientMerge(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.department = cls.env['hospital.department'].create({'name': 'Internal Medicine'})
+        cls.room = cls.env['hospital.room'].create({'room_number': 'M-101', 'department_id': cls.department.id})
+        Partner = cls.env['res.partner']
+        cls.target = cls.env['hospital.patient'].create({
+            'first_name': 'Sara', 'last_name': 'Haddad', 'partner_id': Partner.create({'name': 'Sara H.'}).id,
+        })
+        cls.source = cls.env['hospital.patient'].create({
+            'first_name': 'Sarah', 'last_name': 'Haddad', 'phone': '+962790001122', 'blood_type': 'o+',
+            'partner_id': Partner.create({'name': 'Sarah Haddad'}).id,
+        })
+
+    def _book(self, patient):
+        return self.env['hospital.booking'].create({
+            'patient_id': patient.id,
+            'department_id': self.department.id,
+            'room_id': self.room.id,
+            'date_from': datetime(2026, 3, 1, 10),
+            'date_to': datetime(2026, 3, 3, 10),
+        })
+
+    def test_merge_repoints_and_recomputes(self):
+        booking = self._book(self.source)
+        self.assertEqual(booking.partner_id, self.source.partner_id)
+
+        (self.target | self.source)._merge_into(self.target)
+
+        self.assertFalse(self.source.exists())
+        self.assertEqual(booking.patient_id, self.target)
+        # stored related field recomputed: invoices go to the surviving patient's customer
+        self.assertEqual(booking.partner_id, self.target.partner_id)
+
+    def test_merge_fills_empty_fields(self):
+        (self.target | self.source)._merge_into(self.target)
+        self.assertEqual(self.target.phone, '+962790001122')
+        self.assertEqual(self.target.blood_type, 'o+')
+        self.assertEqual(self.target.first_name, 'Sara', "filled fields never overwrite the target")
+
+    def test_merge_needs_unlink_rights(self):
+        booking = self._book(self.source)
+        receptionist = new_test_user(self.env, login='merge_receptionist',
+                                     groups='the_healing_hms.group_hospital_receptionist')
+        patients = (self.target | self.source).with_user(receptionist)
+        with self.assertRaises(AccessError):
+            patients._merge_into(self.target.with_user(receptionist))
+        self.assertTrue(self.source.exists())
+        self.assertEqual(booking.patient_id, self.source)
+
+    def test_merge_drops_history_snapshots(self):
+        self.source._get_history_snapshot()
+        (self.target | self.source)._merge_into(self.target)
+        self.env.cr.execute("SELECT patient_id FROM hospital_patient_history_snapshot WHERE patient_id IN %s",
+                            [(self.source.id, self.target.id)])
+        self.assertFalse(self.env.cr.fetchall(), "the snapshot of the merged patient is not moved to the target")
+
+    def test_merge_into_itself_is_noop(self):
+        self.assertEqual(self.target._merge_into(self.target), self.target)
+        self.assertTrue(self.target.exists())
+
+    def test_merge_many2many_deduplicates(self):
+        """Two merged patients sharing a link must not violate the relation's primary key."""
+        cr = self.env.cr
+        cr.execute("CREATE TEMPORARY TABLE test_patient_merge_rel (a int, p int, PRIMARY KEY (a, p))")
+        third = self.source.copy({'first_name': 'Sarra'})
+        cr.execute("INSERT INTO test_patient_merge_rel VALUES (1, %s), (1, %s), (2, %s)",
+                   [self.source.id, third.id, self.target.id])
+        fake = type('Field', (), {'relation': 'test_patient_merge_rel', 'column1': 'a', 'column2': 'p'})
+        linked = self.target._merge_many2many(fake, (self.source.id, third.id), self.target.id)
+        self.assertEqual(linked, [1])
+        cr.execute("SELECT a, p FROM test_patient_merge_rel ORDER BY a")
+        self.assertEqual(cr.fetchall(), [(1, self.target.id), (2, self.target.id)])
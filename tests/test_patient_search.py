@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestPatientFuzzySearch(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Patient = cls.env['hospital.patient']
+        cls.males = Patient.create([
+            {'first_name': 'Mohammad', 'last_name': 'Ali', 'gender': 'male', 'phone': '+96279%07d' % i}
+            for i in range(5)
+        ])
+        cls.female = Patient.create({
+            'first_name': 'Mohammad', 'last_name': 'Alia', 'gender': 'female',
+            'phone': '+962781112233', 'email': 'm.alia@example.com',
+        })
+
+    def setUp(self):
+        super().setUp()
+        if not self.env.registry.has_trigram:
+            self.skipTest("pg_trgm is not installed")
+
+    def test_typo_in_name(self):
+        result = dict(self.env['hospital.patient'].name_search('Mohamad'))
+        self.assertTrue(set(self.males.ids) | {self.female.id} <= set(result))
+
+    def test_domain_applied_before_limit(self):
+        """Better-ranked rows outside the domain must not crowd out the match."""
+        result = self.env['hospital.patient'].name_search(
+            'Mohammad Ali', domain=[('gender', '=', 'female')], limit=1)
+        self.assertEqual([patient_id for patient_id, _name in result], self.female.ids)
+
+    def test_domain_applied_to_every_field(self):
+        """A match on the phone or the code must not bypass the domain."""
+        Patient = self.env['hospital.patient']
+        male = self.males[1]
+        for text in ('790000001', male.patient_code):
+            result = Patient.name_search(text, domain=[('gender', '=', 'female')])
+            self.assertNotIn(male.id, dict(result), text)
+        self.assertIn(male.id, dict(Patient.name_search('790000001', domain=[('gender', '=', 'male')])))
+
+    def test_phone_and_code(self):
+        Patient = self.env['hospital.patient']
+        self.assertIn(self.female.id, dict(Patient.name_search('781112233')))
+        code = self.female.patient_code
+        self.assertEqual(Patient.name_search(code, limit=1)[0][0], self.female.id)
+
+    def test_limit(self):
+        self.assertEqual(len(self.env['hospital.patient'].name_search('Mohammad', limit=3)), 3)
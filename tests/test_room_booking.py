@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from psycopg2 import IntegrityError
+
+from odoo.exceptions import ValidationError
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import mute_logger
+
+
+@tagged('post_install', '-at_install')
+class TestRoomBooking(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Department = cls.env['hospital.department']
+        cls.surgery = Department.create({'name': 'Surgery'})
+        cls.cardiology = Department.create({'name': 'Cardiology'})
+        cls.room = cls.env['hospital.room'].create({
+            'room_number': 'S-201', 'department_id': cls.surgery.id, 'room_type': 'double',
+        })
+        cls.other_room = cls.env['hospital.room'].create({'room_number': 'C-101', 'department_id': cls.cardiology.id})
+        Bed = cls.env['hospital.bed']
+        cls.bed_a = Bed.create({'name': 'S-201-A', 'room_id': cls.room.id})
+        cls.bed_b = Bed.create({'name': 'S-201-B', 'room_id': cls.room.id})
+        cls.other_bed = Bed.create({'name': 'C-101-A', 'room_id': cls.other_room.id})
+        cls.patient = cls.env['hospital.patient'].create({'first_name': 'Omar', 'last_name': 'Khalil'})
+
+    def _book(self, bed, date_from, date_to, state='confirmed'):
+        return self.env['hospital.booking'].create({
+            'patient_id': self.patient.id,
+            'department_id': bed.room_id.department_id.id,
+            'room_id': bed.room_id.id,
+            'bed_id': bed.id,
+            'date_from': date_from,
+            'date_to': date_to,
+            'state': state,
+        })
+
+    def test_overlap_rejected(self):
+        self._book(self.bed_a, datetime(2026, 5, 1, 12), datetime(2026, 5, 4, 12))
+        with self.assertRaises((IntegrityError, ValidationError)), mute_logger('odoo.sql_db'):
+            self._book(self.bed_a, datetime(2026, 5, 3, 12), datetime(2026, 5, 6, 12))
+
+    def test_confirm_overlapping_draft_rejected(self):
+        self._book(self.bed_a, datetime(2026, 5, 1, 12), datetime(2026, 5, 4, 12))
+        draft = self._book(self.bed_a, datetime(2026, 5, 2, 12), datetime(2026, 5, 3, 12), state='draft')
+        with self.assertRaises((IntegrityError, ValidationError)), mute_logger('odoo.sql_db'):
+            draft.action_confirm()
+            draft.flush_recordset()
+
+    def test_back_to_back_and_cancelled_allowed(self):
+        first = self._book(self.bed_a, datetime(2026, 5, 1, 12), datetime(2026, 5, 4, 12))
+        self._book(self.bed_a, datetime(2026, 5, 4, 12), datetime(2026, 5, 6, 12))
+        first.action_cancel()
+        self._book(self.bed_a, datetime(2026, 5, 2, 12), datetime(2026, 5, 3, 12))
+
+    def test_free_beds(self):
+        self._book(self.bed_a, datetime(2026, 5, 1, 12), datetime(2026, 5, 4, 12))
+        self._book(self.bed_b, datetime(2026, 5, 1, 12), datetime(2026, 5, 2, 12), state='draft')
+        Bed = self.env['hospital.bed']
+
+        free = Bed._get_free_beds(datetime(2026, 5, 2), datetime(2026, 5, 3), department=self.surgery)
+        self.assertEqual(free, self.bed_b, "draft bookings do not hold a bed")
+        free = Bed._get_free_beds(datetime(2026, 5, 4, 12), datetime(2026, 5, 5), department=self.surgery.id)
+        self.assertEqual(free, self.bed_a | self.bed_b, "the stay ends when the next one may start")
+        free = Bed._get_free_beds(datetime(2026, 5, 2), datetime(2026, 5, 3), room_type='single')
+        self.assertIn(self.other_bed, free)
+        self.assertNotIn(self.bed_b, free)
+
+    def test_booked_beds(self):
+        self._book(self.bed_a, datetime(2026, 5, 1, 12), datetime(2026, 5, 4, 12))
+        Bed = self.env['hospital.bed']
+        self.assertEqual(Bed._get_booked_beds(datetime(2026, 5, 2), datetime(2026, 5, 2)), self.bed_a)
+        self.assertFalse(Bed._get_booked_beds(datetime(2026, 5, 5), datetime(2026, 5, 6)))
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestRoomCounters(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.department = cls.env['hospital.department'].create({'name': 'Orthopedics'})
+        cls.room = cls.env['hospital.room'].create({
+            'room_number': 'O-301', 'department_id': cls.department.id, 'room_type': 'double',
+        })
+        Bed = cls.env['hospital.bed']
+        cls.bed_a = Bed.create({'name': 'O-301-A', 'room_id': cls.room.id})
+        cls.bed_b = Bed.create({'name': 'O-301-B', 'room_id': cls.room.id})
+        cls.patient = cls.env['hospital.patient'].create({'first_name': 'Lina', 'last_name': 'Saleh'})
+        cls.now = fields.Datetime.now()
+
+    def _book(self, bed, date_from, date_to, state='confirmed'):
+        return self.env['hospital.booking'].create({
+            'patient_id': self.patient.id,
+            'department_id': self.department.id,
+            'room_id': self.room.id,
+            'bed_id': bed.id,
+            'date_from': date_from,
+            'date_to': date_to,
+            'state': state,
+        })
+
+    def _move(self, booking, date_from, date_to):
+        # time passing, without the booking hooks
+        booking.flush_recordset()
+        self.env.cr.execute("UPDATE hospital_booking SET date_from = %s, date_to = %s WHERE id = %s",
+                            [date_from, date_to, booking.id])
+        booking.invalidate_recordset(['date_from', 'date_to'])
+
+    def _assertRoom(self, booked, state):
+        self.env.flush_all()
+        self.assertEqual(self.room.bed_count, 2)
+        self.assertEqual(self.room.booked_beds, booked)
+        self.assertEqual(self.room.available_beds, 2 - booked)
+        self.assertEqual(self.room.state, state)
+
+    def test_running_stays_counted(self):
+        booking = self._book(self.bed_a, self.now - timedelta(days=1), self.now + timedelta(days=2))
+        self._assertRoom(1, 'occupied')
+        self.assertEqual(self.bed_a.active_booking_count, 1)
+        self._book(self.bed_b, self.now - timedelta(hours=1), self.now + timedelta(hours=5))
+        self._assertRoom(2, 'unavailable')
+        booking.action_cancel()
+        self._assertRoom(1, 'occupied')
+        self.assertEqual(self.bed_a.active_booking_count, 0)
+
+    def test_past_and_future_stays_not_counted(self):
+        self._book(self.bed_a, self.now - timedelta(days=5), self.now - timedelta(days=2))
+        self._book(self.bed_b, self.now + timedelta(days=2), self.now + timedelta(days=4))
+        self._assertRoom(0, 'available')
+
+    def test_rescheduled_stay(self):
+        booking = self._book(self.bed_a, self.now - timedelta(days=1), self.now + timedelta(days=2))
+        booking.date_to = self.now - timedelta(hours=1)
+        self._assertRoom(0, 'available')
+        booking.write({'bed_id': self.bed_b.id, 'date_to': self.now + timedelta(days=1)})
+        self._assertRoom(1, 'occupied')
+        self.assertEqual((self.bed_a.active_booking_count, self.bed_b.active_booking_count), (0, 1))
+
+    def test_cron_follows_time(self):
+        booking = self._book(self.bed_a, self.now - timedelta(days=1), self.now + timedelta(days=2))
+        later = self._book(self.bed_b, self.now + timedelta(days=1), self.now + timedelta(days=3))
+        Booking = self.env['hospital.booking']
+
+        # the first stay ended, the second one started
+        self._move(booking, self.now - timedelta(days=3), self.now - timedelta(minutes=5))
+        self._move(later, self.now - timedelta(minutes=5), self.now + timedelta(days=2))
+        Booking._cron_update_bed_counters()
+        self._assertRoom(1, 'occupied')
+        self.assertFalse(booking.bed_counted)
+        self.assertTrue(later.bed_counted)
+
+        Booking._rebuild_bed_counters()
+        self._assertRoom(1, 'occupied')
+        self.assertEqual(self.bed_b.active_booking_count, 1)
+
+    def test_room_without_beds(self):
+        room = self.env['hospital.room'].create({'room_number': 'O-399', 'department_id': self.department.id})
+        self.env.flush_all()
+        self.assertEqual(room.state, 'available')
+        room.state = 'unavailable'
+        self.env.flush_all()
+        self.assertEqual(room.state, 'unavailable', "a status set by hand stays until a stay changes the counters")
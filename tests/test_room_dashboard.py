@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestRoomDashboardRefresh(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Department = cls.env['hospital.department']
+        cls.old = Department.create({'name': 'Old Wing'})
+        cls.new = Department.create({'name': 'New Wing'})
+        cls.room = cls.env['hospital.room'].create({'room_number': 'W-1', 'department_id': cls.old.id})
+        cls.new_room = cls.env['hospital.room'].create({'room_number': 'W-2', 'department_id': cls.new.id})
+        cls.bed = cls.env['hospital.bed'].create({'name': 'W-1-A', 'room_id': cls.room.id})
+        cls.booking = cls.env['hospital.booking'].create({
+            'patient_id': cls.env['hospital.patient'].create({'first_name': 'Nour', 'last_name': 'Issa'}).id,
+            'department_id': cls.old.id, 'room_id': cls.room.id,
+            'date_from': datetime(2026, 8, 1), 'date_to': datetime(2026, 8, 2),
+        })
+
+    def _pending(self):
+        Dashboard = self.env['hospital.room.dashboard']
+        return self.env.cr.precommit.data.get(Dashboard._REFRESH_PRECOMMIT_KEY, set())
+
+    def _assertBothScheduled(self, record, vals):
+        self.env.cr.precommit.run()
+        record.write(vals)
+        self.assertTrue({self.old.id, self.new.id} <= self._pending())
+
+    def test_room_moves(self):
+        self._assertBothScheduled(self.room, {'department_id': self.new.id})
+
+    def test_bed_moves(self):
+        self._assertBothScheduled(self.bed, {'room_id': self.new_room.id})
+
+    def test_booking_moves(self):
+        self._assertBothScheduled(self.booking, {'room_id': self.new_room.id, 'department_id': self.new.id})
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from datetime import date, datetime
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestRoomTariff(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Tariff = cls.env['hospital.room.tariff']
+        Tariff.search([]).action_archive()
+        cls.department = cls.env['hospital.department'].create({'name': 'Pediatrics'})
+        Room = cls.env['hospital.room']
+        cls.single = Room.create({'room_number': 'P-101', 'department_id': cls.department.id, 'room_type': 'single'})
+        cls.ward = Room.create({'room_number': 'P-150', 'department_id': cls.department.id, 'room_type': 'ward'})
+        cls.patient = cls.env['hospital.patient'].create({'first_name': 'Yara', 'last_name': 'Nasser'})
+        cls.tariff = Tariff.create({'room_type': 'single', 'date_from': date(2026, 1, 1), 'price_per_day': 100.0})
+        Tariff.create({'room_type': 'ward', 'date_from': date(2026, 1, 1), 'price_per_day': 40.0})
+        # department rate from 2026-07-02
+        Tariff.create({
+            'room_type': 'single', 'department_id': cls.department.id,
+            'date_from': date(2026, 7, 2), 'price_per_day': 150.0,
+        })
+
+    def _book(self, room, date_from, date_to, **vals):
+        return self.env['hospital.booking'].create(dict({
+            'patient_id': self.patient.id,
+            'department_id': self.department.id,
+            'room_id': room.id,
+            'date_from': date_from,
+            'date_to': date_to,
+        }, **vals))
+
+    def test_price_on_create(self):
+        booking = self._book(self.single, datetime(2026, 6, 30, 10), datetime(2026, 7, 3, 9))
+        self.assertEqual(booking.days, 3)
+        self.assertEqual(booking.price, 100.0 + 100.0 + 150.0)
+        self.assertFalse(booking.price_manual)
+
+    def test_tariff_change_reprices(self):
+        with patch.object(type(self.env.registry), 'clear_cache') as clear_cache:
+            self.assertEqual(self._book(self.single, datetime(2026, 3, 1), datetime(2026, 3, 2)).price, 100.0)
+            self.tariff.price_per_day = 110.0
+            self.assertEqual(self._book(self.single, datetime(2026, 3, 1), datetime(2026, 3, 2)).price, 110.0)
+            # same transaction, same write_date
+            self.tariff.price_per_day = 120.0
+            self.assertEqual(self._book(self.single, datetime(2026, 3, 1), datetime(2026, 3, 2)).price, 120.0)
+        clear_cache.assert_not_called()
+
+    def test_reprice_in_one_write(self):
+        short = self._book(self.single, datetime(2026, 3, 1), datetime(2026, 3, 2))
+        long = self._book(self.single, datetime(2026, 3, 1), datetime(2026, 3, 4))
+        bookings = short | long
+        Booking = type(bookings)
+        with patch.object(Booking, '_update_dashboard', autospec=True) as update_dashboard:
+            bookings.room_id = self.ward
+        self.assertEqual(update_dashboard.call_count, 1)
+        self.assertEqual((short.price, long.price), (40.0, 120.0))
+
+    def test_manual_price_kept(self):
+        booking = self._book(self.single, datetime(2026, 3, 1), datetime(2026, 3, 3), price=80.0)
+        self.assertTrue(booking.price_manual)
+        self.assertEqual(booking.days, 2)
+        booking.date_to = datetime(2026, 3, 5)
+        self.assertEqual((booking.days, booking.price), (4, 80.0))
+        booking.price = 90.0
+        booking.room_id = self.ward
+        self.assertEqual(booking.price, 90.0)
+        booking.write({'date_to': datetime(2026, 3, 6), 'price': 95.0})
+        self.assertEqual((booking.days, booking.price), (5, 95.0))
+
+        booking.price_manual = False
+        self.assertEqual((booking.days, booking.price), (5, 200.0))
+
+    def test_invoiced_price_kept(self):
+        booking = self._book(self.single, datetime(2026, 3, 1), datetime(2026, 3, 2), state='invoiced')
+        booking.date_to = datetime(2026, 3, 3)
+        self.assertEqual((booking.days, booking.price), (2, 100.0))
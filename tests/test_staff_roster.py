@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestStaffRoster(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.department = cls.env['hospital.department'].create({'name': 'Cardiology'})
+        cls.doctor = cls.env['hospital.staff'].create({
+            'name': 'Dr. Roster', 'job_title': 'doctor', 'email': 'dr.roster@example.com',
+            'department_id': cls.department.id,
+        })
+        cls.Roster = cls.env['hospital.staff.roster']
+        cls.Roster.create({
+            'staff_id': cls.doctor.id, 'kind': 'shift',
+            'date_start': datetime(2026, 5, 4, 8), 'date_end': datetime(2026, 5, 4, 16),
+        })
+
+    def _available(self, date_from, date_to=None):
+        return self.Roster._is_staff_available(self.doctor, date_from, date_to)
+
+    def test_window_inside_shift(self):
+        self.assertTrue(self._available(datetime(2026, 5, 4, 9), datetime(2026, 5, 4, 10)))
+
+    def test_window_ending_at_shift_end(self):
+        self.assertTrue(self._available(datetime(2026, 5, 4, 15, 30), datetime(2026, 5, 4, 16)))
+        self.assertFalse(self._available(datetime(2026, 5, 4, 15, 30), datetime(2026, 5, 4, 16, 30)))
+
+    def test_instant(self):
+        self.assertTrue(self._available(datetime(2026, 5, 4, 8)))
+        self.assertFalse(self._available(datetime(2026, 5, 4, 16)), "shifts are half-open")
+
+    def test_leave(self):
+        self.Roster.create({
+            'staff_id': self.doctor.id, 'kind': 'leave',
+            'date_start': datetime(2026, 5, 4, 12), 'date_end': datetime(2026, 5, 4, 13),
+        })
+        self.assertFalse(self._available(datetime(2026, 5, 4, 11, 30), datetime(2026, 5, 4, 12, 30)))
+        self.assertTrue(self._available(datetime(2026, 5, 4, 11), datetime(2026, 5, 4, 12)))
+
+    def test_manual_flag(self):
+        self.doctor.is_available = False
+        self.assertFalse(self._available(datetime(2026, 5, 4, 9), datetime(2026, 5, 4, 10)))
+
+    def test_filters(self):
+        available = self.Roster._get_available_staff(
+            datetime(2026, 5, 4, 9), datetime(2026, 5, 4, 10), department=self.department)
+        self.assertEqual(available, self.doctor)
+        other = self.env['hospital.department'].create({'name': 'Neurology'})
+        self.assertFalse(self.Roster._get_available_staff(
+            datetime(2026, 5, 4, 9), datetime(2026, 5, 4, 10), department=other))